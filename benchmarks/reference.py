@@ -0,0 +1,119 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Per-pixel downscaling of version 1.4.5, kept as the golden reference of the benchmarks
+##########################################################
+
+# import libraries
+import numpy, math
+
+####################################################################################
+# The per-pixel loop of single/main.py 1.4.5 (Steps 4 to 10), unchanged except that
+# it returns the assigned values of the window row0:row1, col0:col1 instead of
+# rewriting the output GeoTIFF for every pixel. It is very slow: use small windows.
+####################################################################################
+
+
+def reference(data, data2, sheet, row0, row1, col0, col1):
+    """Downscale the window row0:row1, col0:col1 of the BaseMap25 array data with the xlrd sheet of the expert table."""
+    rows, cols = data.shape
+    xls_cols = sheet.ncols  # get the number of columns of the Excel sheet
+    xls_rows = sheet.nrows  # get the number of rows of the Excel sheet
+    out = numpy.zeros((row1 - row0, col1 - col0), dtype=numpy.uint8)
+    for y in range(row0, row1):
+        for x in range(col0, col1):
+            value = data[y, x] #get pixel value (BaseMap25)
+            if value > 0 and value < 255:  #only do something if the pixel value is greater than 0 (0=country mask) and smaller than 255 (no data)
+                ##############################################################################################################
+                #Step 5: According to expert system table, select those categories that could be elected for the current pixel
+                ##############################################################################################################
+                BMvalue1 = []  # create an empty array to be filled by values 1 for BaspeMap25
+                BMvalue2 = []  # create an empty array to be filled by values 2 for BaspeMap25
+                BMvalue3 = []  # create an empty array to be filled by values 3 for BaspeMap25
+                for i in range(xls_cols): #iterate in columns to find the BaseMap25 value
+                    if sheet.cell_value(2, i) == value: #once identified the corresponding value
+                        j = 3 #start at the 3rd row to remove headers
+                        while j < xls_rows: #read the identified column
+                            if sheet.cell_value(j, i) == 1: #acceptable weight values for 1,  possible choices
+                                BMvalue1.append(str(int(sheet.cell_value(j, 1)))+';'+str(sheet.cell_value(j, 2))+';'+str(int(sheet.cell_value(j, i)))) #insert [CODE, Landuse100, weight]
+                            if sheet.cell_value(j, i) == 2: #acceptable weight values for 2, unique choice
+                                BMvalue2.append(str(int(sheet.cell_value(j, 1)))+';'+str(sheet.cell_value(j, 2))+';'+str(int(sheet.cell_value(j, i)))) #insert [CODE, Landuse100, weight]
+                            if sheet.cell_value(j, i) == 3: #acceptable weight values for 3, best replacement choice in case of lack of decision
+                                BMvalue3.append(str(int(sheet.cell_value(j, 1)))+';'+str(sheet.cell_value(j, 2))+';'+str(int(sheet.cell_value(j, i)))) #insert [CODE, Landuse100, weight]
+                            j = j+1 #iterate until last row of the expert table
+
+                ############################################################################################
+                # Step 6: Select among the 36 nearest Landuse100 neigbours those with acceptable categories
+                ############################################################################################
+                LUvalue = []  # create an empty array to be filled by values for Landuse100
+                #iterate in the neighbours window starting from the UL corner
+                yRow = round(y/4)*4 - 9
+                for a in range(6):
+                    xCol = round(x/4)*4 - 10
+                    for b in range(6):
+                        if (yRow >= 0 and xCol >= 0 and yRow < rows and xCol < cols):
+                            if data2[yRow, xCol] < 255:  # only pixel values inside Switzerland, nodata = 255
+                                LUvalue.append(
+                                    str(yRow) + ';' + str(xCol) + ';' + str(data2[yRow, xCol]))  # insert [Row;Column;Value]
+                        xCol = xCol + 4 #move from 4 pixels to correspond to a 100 pixel
+                    yRow = yRow + 4 #move form 4 pixels to correspond to a 100 pixel
+
+                ########################################################################
+                # Step 7: Calculate the inverse distance to each neighbour
+                # Step 8: Sum up the inverse distances for each category
+                # Step 9: Assign the category with higher score to the BaseMap25 pixel
+                ########################################################################
+                newArray = []
+                pixelValueArray = []
+                pixelValue = 0
+                uniqueValues = []
+
+                ###### Case 2 #####
+                if len(BMvalue2) > 0:  # unique value case; BM25 value = 2 then assign the only value possible in LU100
+                    pixelValue = BMvalue2[0].split(';')[0]  # directly assign the value
+
+                ###### Case 3 #####
+                if len(BMvalue1) > 0 and len(BMvalue3) > 0 and len(BMvalue2)==0: #case with possible value (1) and (3); (3) = default choice
+                    for d in range(len(LUvalue)):
+                        newArray.append(LUvalue[d].split(';')[2])  # position 2 is the value
+                        uniqueValues = numpy.unique(newArray)  # get unique values from the array
+                    for m in range(len(BMvalue1)): #iterate in all possible values for BM25 class = 1
+                        for n in range(len(uniqueValues)): #iterate in all possible unique values of LU100
+                            if uniqueValues[n] == BMvalue1[m].split(';')[0]: #compare values from BM25 and LU100
+                                pixelValueArray.append(int(uniqueValues[n])) #insert in array only acceptable values
+                    for m in range(len(BMvalue3)): #iterate in all possible values for BM25 class = 3
+                        for n in range(len(uniqueValues)): #iterate in all possible unique values of LU100
+                            if uniqueValues[n] == BMvalue3[m].split(';')[0]: #compare values from BM25 and LU100
+                                pixelValueArray.append(int(uniqueValues[n])) #insert in array only acceptable values
+                    if len(pixelValueArray) == 1:  # if only 1 value is stored in the array
+                        pixelValue = int(pixelValueArray[0])  # assign the new pixel value to be written in the new raster file
+                    elif len(pixelValueArray) == 0: #in case the acceptable value array is empty, assign the default (3) value
+                        pixelValue = BMvalue3[0].split(';')[0]  # assign the default (3) value
+                    else:
+                        pxVal = []  # store class and sum of IDW
+                        pxVal2 = []  # store only IDW values to identify the highest one
+                        for l in range(len(pixelValueArray)):  # iterate in LUvalue array to get position and calculate distances
+                            idwClass = 0  # used for summing IDW
+                            for i in range(len(LUvalue)):
+                                if pixelValueArray[l] == int(LUvalue[i].split(';')[2]):  # ensure that we iterate only with acceptable LU100 values
+                                    # initial pixel position corresponds to BM25; y and x variables
+                                    dY = abs(y - int(LUvalue[i].split(';')[0]))  # distance following rows in pixel value
+                                    dX = abs(x - int(LUvalue[i].split(';')[1]))  # distance following columns in pixel value
+                                    distXYZ = math.sqrt((dX ** 2) + (dY ** 2))  # hypotenuse
+                                    rangeXY = 18.38  # sqrt (13^2+13^2) distance max 13 pixels
+                                    lissage = 0.1 # entre 0.01 et 1
+                                    IDW = 1 / (distXYZ/rangeXY + lissage)
+                                    idwClass = idwClass + IDW  # sum IDW by acceptable categories
+                            pxVal.append(str(pixelValueArray[l]) + ';' + str(idwClass))  # array with class and sum of IDW
+                            pxVal2.append(str(idwClass))
+                        # assign pixel value to the category with highest IDW
+                        highIDW3 = max(pxVal2, key=lambda x: float(x))  # get the highest sum of IDW
+                        for g in range(len(pxVal)):
+                            if highIDW3 == pxVal[g].split(';')[1]:
+                                pixelValue = pxVal[g].split(';')[0]
+
+                out[y - row0, x - col0] = int(pixelValue)
+    return out
@@ -0,0 +1,280 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Benchmarks of the downscaling of Swiss LCLU data on synthetic rasters
+##########################################################
+
+# import libraries
+import argparse, json, os, resource, shutil, subprocess, sys, time
+
+import numpy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+sys.path.insert(0, HERE)
+
+####################################################################################
+# For every size, synthetic BaseMap25 and Landuse100 GeoTIFFs are generated once and
+# each stage runs in its own process, so its peak RSS and I/O bytes are its own:
+#   serial    the single-node version, whole rasters in memory
+#   pool      the multi-core version (lulcdown.local)
+#   stream    one process within a memory budget, reads and writes overlapped
+#             (lulcdown.scheduler)
+#   tiles     the array tasks of the parallel version, one after the other
+#   task      the array task of the largest tile alone (lulcdown.hpc.run_tile) within the
+#             memory budget, its peak RSS being the memory to request for each task
+#             (--mem of run_main_HPC.sh)
+#   merge     the merge of the tiles into a tiled, compressed mosaic within the memory budget
+#   golden    the per-pixel algorithm of version 1.4.5 on small windows compared to the
+#             serial output, and the serial, pool, stream and merged outputs compared pixel by pixel
+# Usage: python benchmarks/run.py --sizes 1k,4k --workers 8 --json report.json
+####################################################################################
+
+EXPERT_TABLE = os.path.join(HERE, '..', 'expert_table_72cat_v4.xls')
+STAGES = ('serial', 'pool', 'stream', 'tiles', 'task', 'merge', 'golden')
+GOLDEN = 96  # side of the windows checked against the per-pixel algorithm (about 10000 pixels/s)
+
+
+def _io():
+    """I/O counters of this process and its reaped children (Linux only)."""
+    counters = {}
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                key, value = line.split(':')
+                counters[key] = int(value)
+    except IOError:
+        pass
+    return counters
+
+
+def _peak_rss():
+    """Peak resident memory in bytes of this process or of its largest child."""
+    scale = 1 if sys.platform == 'darwin' else 1024  # bytes on macOS, kilobytes on Linux
+    return scale * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _paths(args):
+    d = os.path.join(args.dir, args.size)
+    return {'dir': d, 'basemap': os.path.join(d, 'basemap25.tif'), 'landuse': os.path.join(d, 'landuse100.tif'),
+            'inputs': os.path.join(d, 'inputs.json'), 'serial': os.path.join(d, 'serial.tif'),
+            'pool': os.path.join(d, 'pool.tif'), 'stream': os.path.join(d, 'stream.tif'), 'tiles': os.path.join(d, 'tiles'),
+            'manifest': os.path.join(d, 'tiles.json'), 'task': os.path.join(d, 'task'),
+            'merge': os.path.join(d, 'merged.tif')}
+
+
+###### stages, run in a child process ######
+
+def generate(args, p):
+    import synthetic
+    from lulcdown.expert_table import ExpertTable
+    rows, cols = synthetic.size(args.size)
+    inputs = {'rows': rows, 'cols': cols, 'seed': args.seed, 'mask': args.mask}
+    if os.path.exists(p['inputs']):
+        with open(p['inputs']) as f:
+            previous = json.load(f)
+        if all(previous.get(k) == v for k, v in inputs.items()):
+            return previous  # same inputs, generated before
+    os.makedirs(p['dir'], exist_ok=True)
+    table = ExpertTable.from_xls(args.expert_table)
+    inputs['valid'] = synthetic.write(p['basemap'], p['landuse'], rows, cols, table, args.seed, args.mask)
+    with open(p['inputs'], 'w') as f:
+        json.dump(inputs, f)
+    return inputs
+
+
+def serial(args, p):
+    from osgeo import gdal
+    from lulcdown.engine import downscale_rows
+    from lulcdown.expert_table import ExpertTable
+    from lulcdown.raster import create_output
+    raster, LUrast = gdal.Open(p['basemap']), gdal.Open(p['landuse'])
+    data = raster.GetRasterBand(1).ReadAsArray()
+    data2 = LUrast.GetRasterBand(1).ReadAsArray()
+    table = ExpertTable.from_xls(args.expert_table)
+    ds = create_output(p['serial'], raster.RasterXSize, raster.RasterYSize, raster.GetGeoTransform(),
+                       raster.GetProjection())
+    for yoff, result in downscale_rows(data, data2, table):
+        ds.GetRasterBand(1).WriteArray(result, 0, yoff)
+    ds.FlushCache()
+    ds = None
+
+
+def pool(args, p):
+    from lulcdown.local import run
+    run(p['basemap'], p['landuse'], args.expert_table, p['pool'], args.workers)
+
+
+def stream(args, p):
+    from lulcdown.scheduler import run
+    run(p['basemap'], p['landuse'], args.expert_table, p['stream'], args.memory)
+
+
+def tiles(args, p):
+    from osgeo import gdal
+    from lulcdown.engine import downscale_rows
+    from lulcdown.expert_table import ExpertTable
+    from lulcdown.kernel import Kernel
+    from lulcdown.merge import tile_path
+    from lulcdown.raster import create_output
+    from lulcdown.tiling import count_valid, plan, write_manifest
+    from lulcdown.checkpoint import tile_inputs
+    raster, LUrast = gdal.Open(p['basemap']), gdal.Open(p['landuse'])
+    band, band2 = raster.GetRasterBand(1), LUrast.GetRasterBand(1)
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+    manifest = plan(count_valid(band), args.tasks, rows, cols, geotransform=raster.GetGeoTransform(),
+                    projection=raster.GetProjection())
+    write_manifest(p['manifest'], manifest)
+    os.makedirs(p['tiles'], exist_ok=True)
+    table = ExpertTable.from_xls(args.expert_table)
+    kernel = Kernel()
+    for tile in manifest['tiles']:  # the array tasks, in sequence
+        data, data2, lu_row0, lu_col0 = tile_inputs(band, band2, tile, kernel)
+        ds = create_output(tile_path(p['tiles'], tile), tile['col1'] - tile['col0'], tile['row1'] - tile['row0'],
+                           raster.GetGeoTransform(), raster.GetProjection(), xoff=tile['col0'], yoff=tile['row0'])
+        for yoff, result in downscale_rows(data, data2, table, tile['row0'], tile['col0'], rows, cols, lu_row0,
+                                           lu_col0, kernel):
+            ds.GetRasterBand(1).WriteArray(result, 0, yoff)
+        ds = None
+
+
+def task(args, p):
+    from lulcdown.hpc import run_tile
+    from lulcdown.tiling import read_manifest
+    manifest = read_manifest(p['manifest'])  # planned by the tiles stage
+    tile = max(manifest['tiles'], key=lambda t: (t['row1'] - t['row0']) * (t['col1'] - t['col0']))  # largest window
+    shutil.rmtree(p['task'], ignore_errors=True)  # computed again, not skipped as complete
+    os.makedirs(p['task'])
+    run_tile(manifest['tiles'].index(tile), p['basemap'], p['landuse'], args.expert_table, p['manifest'], p['task'],
+             memory=args.memory)
+    return {'tile': tile['id'], 'rows': tile['row1'] - tile['row0'], 'cols': tile['col1'] - tile['col0']}
+
+
+def merge(args, p):
+    from lulcdown.hpc import merge as merge_mosaic
+    from lulcdown.tiling import read_manifest
+    merge_mosaic(read_manifest(p['manifest']), p['tiles'], p['merge'], compress='DEFLATE', predictor=False,
+                 overviews=False, memory=args.memory)  # GDAL block cache within the budget
+
+
+def _windows(data, g):
+    """Golden windows: the centre of the raster and the western border of the country."""
+    rows, cols = data.shape
+    y = rows // 2
+    inside = numpy.flatnonzero(data[y] > 0)
+    x = int(inside[0]) if len(inside) else cols // 2
+    windows = []
+    for y0, x0 in ((y - g // 2, cols // 2 - g // 2), (y - g // 2, x - g // 2)):
+        y0, x0 = max(0, min(rows - g, y0)), max(0, min(cols - g, x0))
+        windows.append((y0, min(rows, y0 + g), x0, min(cols, x0 + g)))
+    return windows
+
+
+def golden(args, p):
+    import xlrd
+    from osgeo import gdal
+    from reference import reference
+    data = gdal.Open(p['basemap']).GetRasterBand(1).ReadAsArray()
+    data2 = gdal.Open(p['landuse']).GetRasterBand(1).ReadAsArray()
+    sheet = xlrd.open_workbook(args.expert_table).sheet_by_index(0)
+    out = gdal.Open(p['serial']).GetRasterBand(1)
+    checks = {}
+    for row0, row1, col0, col1 in _windows(data, args.golden):
+        expected = reference(data, data2, sheet, row0, row1, col0, col1)
+        result = out.ReadAsArray(col0, row0, col1 - col0, row1 - row0)
+        checks['reference %d:%d,%d:%d' % (row0, row1, col0, col1)] = int((expected != result).sum())
+    for name in ('pool', 'stream', 'merge'):  # whole outputs, strip by strip
+        if not os.path.exists(p[name]):
+            continue
+        other = gdal.Open(p[name]).GetRasterBand(1)
+        mismatches = 0
+        for yoff in range(0, out.YSize, 256):
+            h = min(256, out.YSize - yoff)
+            mismatches += int((out.ReadAsArray(0, yoff, out.XSize, h) != other.ReadAsArray(0, yoff, out.XSize, h)).sum())
+        checks['serial = ' + name] = mismatches
+    return checks
+
+
+def _child(args):
+    """Run one stage and print its measures as the last line of the output."""
+    p = _paths(args)
+    io = _io()
+    start, cpu = time.time(), os.times()
+    result = globals()[args.stage](args, p)
+    end, cpu2 = time.time(), os.times()
+    io2 = _io()
+    measures = {'seconds': end - start, 'cpu': sum(cpu2[:4]) - sum(cpu[:4]), 'peak_rss': _peak_rss(),
+                'read_bytes': io2.get('rchar', 0) - io.get('rchar', 0),
+                'write_bytes': io2.get('wchar', 0) - io.get('wchar', 0),
+                'disk_read_bytes': io2.get('read_bytes', 0) - io.get('read_bytes', 0),
+                'disk_write_bytes': io2.get('write_bytes', 0) - io.get('write_bytes', 0),
+                'result': result}
+    print(json.dumps(measures))
+
+
+###### driver ######
+
+def _stage(args, size, stage):
+    command = [sys.executable, os.path.abspath(__file__), '--stage', stage, '--size', size, '--dir', args.dir,
+               '--seed', str(args.seed), '--mask', str(args.mask), '--tasks', str(args.tasks),
+               '--golden', str(args.golden), '--expert-table', args.expert_table, '--memory', args.memory]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    output = subprocess.check_output(command, universal_newlines=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the downscaling stages on synthetic rasters')
+    parser.add_argument('--sizes', default='1k', help='comma separated sizes: 1k, 2k, 4k, 8k, national or RxC '
+                                                       '(default: 1k)')
+    parser.add_argument('--stages', default=','.join(STAGES), help='comma separated stages (default: all)')
+    parser.add_argument('--dir', default='bench', help='directory of the rasters (default: bench)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic rasters (default: 0)')
+    parser.add_argument('--mask', type=float, default=0.54, help='share of pixels inside the country (default: 0.54)')
+    parser.add_argument('--workers', type=int, default=None, help='processes of the pool stage (default: all cores)')
+    parser.add_argument('--tasks', type=int, default=16, help='tiles of the tiles stage (default: 16)')
+    parser.add_argument('--memory', default='1G',
+                        help='memory budget of the stream, task and merge stages (default: 1G)')
+    parser.add_argument('--golden', type=int, default=GOLDEN, help='side of the golden windows (default: 96)')
+    parser.add_argument('--expert-table', default=EXPERT_TABLE, help='expert table (.xls)')
+    parser.add_argument('--json', default=None, help='write the report to this JSON file')
+    parser.add_argument('--stage', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--size', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.expert_table = os.path.abspath(args.expert_table)
+    if args.stage:
+        return _child(args)
+
+    report, failed = [], False
+    print('%-10s %-8s %9s %9s %10s %10s %10s' % ('size', 'stage', 'seconds', 'Mpx/s', 'peak MB', 'read MB',
+                                               'write MB'))
+    for size in args.sizes.split(','):
+        inputs = _stage(args, size, 'generate')['result']
+        for stage in args.stages.split(','):
+            measures = _stage(args, size, stage)
+            measures.update({'size': size, 'stage': stage, 'rows': inputs['rows'], 'cols': inputs['cols'],
+                             'valid': inputs['valid']})
+            measures['pixels_per_second'] = inputs['rows'] * inputs['cols'] / max(measures['seconds'], 1e-9)
+            measures['valid_per_second'] = inputs['valid'] / max(measures['seconds'], 1e-9)
+            report.append(measures)
+            print('%-10s %-8s %9.2f %9.2f %10.1f %10.1f %10.1f' % (
+                size, stage, measures['seconds'], measures['pixels_per_second'] / 1e6, measures['peak_rss'] / 2**20,
+                measures['read_bytes'] / 2**20, measures['write_bytes'] / 2**20))
+            if stage == 'golden':
+                for check, mismatches in sorted(measures['result'].items()):
+                    print('    %-36s %s' % (check, 'identical' if mismatches == 0 else '%d mismatches' % mismatches))
+                    failed = failed or mismatches > 0
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Synthetic BaseMap25 and Landuse100 rasters for the benchmarks
+##########################################################
+
+# import libraries
+import numpy
+
+####################################################################################
+# The synthetic country is a rough ellipse covering about the share of its bounding
+# box that Switzerland covers. Inside, BaseMap25 holds patches of the BaseMap25 values
+# of the expert table (large fields mixed with small patches) with a skewed class
+# distribution; Landuse100 holds, for every 4x4 block of pixels, one of the codes
+# accepted by the expert table for the BaseMap25 value of the block, and sometimes
+# any code, as the statistics do not always agree with the base map. Outside, BaseMap25
+# is 0 (country mask) and Landuse100 255 (no data). Everything is drawn from the seed,
+# strip by strip, so national sizes are generated in bounded memory.
+####################################################################################
+
+SIZES = {'1k': (1024, 1024), '2k': (2048, 2048), '4k': (4096, 4096), '8k': (8192, 8192),
+         'national': (8800, 14000)}  # rows, columns; national = Switzerland at 25m
+MASK = 0.54  # share of the bounding box inside the country (Switzerland: about 41300 of 76500 km2)
+FIELD = 64  # size in pixels of the large fields
+PATCH = 8  # size in pixels of the small patches
+PATCHES = 0.3  # share of the small patches
+MISMATCH = 0.1  # share of the Landuse100 cells holding any acceptable code
+STRIP = 512  # rows generated at once, a multiple of FIELD
+GEOTRANSFORM = (2485000.0, 25.0, 0.0, 1296000.0, 0.0, -25.0)  # LV95, 25m pixels
+EPSG = 2056  # CH1903+ / LV95
+
+
+def size(name):
+    """(rows, cols) of a preset size name or of ROWSxCOLS, e.g. 3000x5000."""
+    if name in SIZES:
+        return SIZES[name]
+    rows, cols = [int(n) for n in name.lower().split('x')]
+    return rows, cols
+
+
+def _classes(table, rng):
+    """BaseMap25 values of the expert table and their skewed frequencies."""
+    values = numpy.flatnonzero(table.weights.any(axis=1))
+    values = values[(values > 0) & (values < 255)]
+    share = rng.dirichlet(numpy.full(len(values), 0.5))  # a few dominant classes, many rare ones
+    return values, share
+
+
+def _codes(table):
+    """Codes accepted for each BaseMap25 value (any weight), padded, and their number."""
+    count = (table.weights > 0).sum(axis=1)
+    codes = numpy.zeros((256, max(1, count.max())), dtype=numpy.uint8)
+    for value in range(256):
+        accepted = numpy.flatnonzero(table.weights[value])
+        codes[value, :len(accepted)] = accepted
+    return codes, count
+
+
+def _mask(y, cols, rows, fraction, phases):
+    """Inside of the country for the rows y: an ellipse with a wavy border."""
+    x = numpy.arange(cols)
+    dy = (y[:, None] + 0.5) / rows * 2 - 1
+    dx = (x[None, :] + 0.5) / cols * 2 - 1
+    angle = numpy.arctan2(dy, dx)
+    border = numpy.sqrt(fraction / (numpy.pi / 4))  # ellipse covering fraction of the box
+    border = border * (1 + 0.08 * sum(numpy.sin(k * angle + p) for k, p in zip((3, 5, 9), phases)) / 3)
+    return numpy.hypot(dx, dy) < numpy.minimum(border, 0.99)
+
+
+def generate(rows, cols, table, seed=0, fraction=MASK):
+    """Yield (row offset, BaseMap25 strip, Landuse100 strip) of the synthetic rasters."""
+    rng = numpy.random.RandomState(seed)
+    values, share = _classes(table, rng)
+    codes, count = _codes(table)
+    phases = rng.uniform(0, 2 * numpy.pi, 3)
+    fields = values[rng.choice(len(values), (-(-rows // FIELD), -(-cols // FIELD)), p=share)]
+    for yoff in range(0, rows, STRIP):
+        h = min(STRIP, rows - yoff)
+        rng = numpy.random.RandomState([seed, yoff // STRIP])  # reproducible strip by strip
+        y = numpy.arange(yoff, yoff + h)
+        data = fields[y[:, None] // FIELD, numpy.arange(cols)[None, :] // FIELD]
+        patches = values[rng.choice(len(values), (-(-h // PATCH), -(-cols // PATCH)), p=share)]
+        small = rng.random_sample(patches.shape) < PATCHES
+        patches = numpy.where(small, patches, 0)
+        patches = numpy.repeat(numpy.repeat(patches, PATCH, axis=0), PATCH, axis=1)[:h, :cols]
+        data = numpy.where(patches > 0, patches, data).astype(numpy.uint8)
+
+        # Landuse100: one code per 4x4 block, from the BaseMap25 value of its UL pixel
+        cells = data[::4, ::4]
+        pick = (rng.random_sample(cells.shape) * count[cells]).astype(numpy.int64)
+        lu = codes[cells, pick]
+        anything = rng.random_sample(cells.shape) < MISMATCH
+        lu[anything] = table.candidates[rng.randint(0, len(table.candidates), anything.sum())]
+        data2 = numpy.repeat(numpy.repeat(lu, 4, axis=0), 4, axis=1)[:h, :cols]
+
+        inside = _mask(y, cols, rows, fraction, phases)
+        data[~inside] = 0  # country mask
+        data2 = numpy.where(inside, data2, 255).astype(numpy.uint8)  # no data outside the country
+        yield yoff, data, data2
+
+
+def arrays(rows, cols, table, seed=0, fraction=MASK):
+    """Whole synthetic BaseMap25 and Landuse100 arrays."""
+    data = numpy.empty((rows, cols), dtype=numpy.uint8)
+    data2 = numpy.empty((rows, cols), dtype=numpy.uint8)
+    for yoff, strip, strip2 in generate(rows, cols, table, seed, fraction):
+        data[yoff:yoff + strip.shape[0]] = strip
+        data2[yoff:yoff + strip.shape[0]] = strip2
+    return data, data2
+
+
+def write(basemap, landuse, rows, cols, table, seed=0, fraction=MASK):
+    """Write the synthetic BaseMap25 and Landuse100 GeoTIFFs and return the number of valid pixels."""
+    from osgeo import osr
+    from lulcdown.raster import create_output
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(EPSG)
+    ds = create_output(basemap, cols, rows, GEOTRANSFORM, srs.ExportToWkt())
+    ds2 = create_output(landuse, cols, rows, GEOTRANSFORM, srs.ExportToWkt())
+    valid = 0
+    for yoff, data, data2 in generate(rows, cols, table, seed, fraction):
+        ds.GetRasterBand(1).WriteArray(data, 0, yoff)
+        ds2.GetRasterBand(1).WriteArray(data2, 0, yoff)
+        valid += int(((data > 0) & (data < 255)).sum())
+    ds.FlushCache()
+    ds2.FlushCache()
+    ds = ds2 = None
+    return valid
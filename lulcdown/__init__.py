@@ -0,0 +1,10 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Downscaling of Swiss LCLU data - shared engine
+##########################################################
+
+__version__ = '1.5.0'
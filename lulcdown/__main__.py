@@ -0,0 +1,162 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Command line of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os, sys
+
+from . import config as configuration
+
+####################################################################################
+# One entry point for every mode, all running the same engine and reading the same
+# configuration file (lulcdown/config.py):
+#   python -m lulcdown config lulcdown.json          write the defaults to edit
+#   python -m lulcdown plan                          tile manifest for the array tasks
+#   python -m lulcdown run-tile [ID]                 one array task (ID = $SLURM_ARRAY_TASK_ID)
+#   python -m lulcdown run-local                     whole raster on the cores of this computer
+#   python -m lulcdown status [--submit SCRIPT]      tiles to rerun, missing, incomplete or stale
+#   python -m lulcdown merge                         mosaic of the complete tiles
+# --config FILE reads another file than ./lulcdown.json and --set SECTION.KEY=VALUE
+# overrides a setting, e.g. --set run.workers=1 for a serial run or --set run.memory=8G to
+# run within 8 GB (run-local, and each array task or the merge, plan printing the memory
+# to request from SLURM).
+####################################################################################
+
+
+def plan(config):
+    from .prepare import open_raster
+    from .scheduler import parse_size, plan_rows, slurm_memory, tile_budget
+    from .tiling import count_valid, imbalance, plan as plan_tiles, regular, write_manifest
+    tiling = config['tiling']
+    raster = open_raster(config['inputs']['basemap'])  # open raster, or its prepared raw file
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+    counts = count_valid(raster.GetRasterBand(1), tiling['cell'])
+    georef = (raster.GetGeoTransform(), raster.GetProjection())
+    if tiling['regular']:
+        nR, nC = [int(n) for n in tiling['regular'].lower().split('x')]
+        manifest = regular(counts, nR, nC, rows, cols, tiling['cell'], *georef)
+    else:
+        manifest = plan_tiles(counts, tiling['tasks'], rows, cols, tiling['cell'], *georef)
+    mem = ''
+    memory = config['run']['memory']
+    if memory:  # every task within the budget, the largest tile included
+        largest = max(manifest['tiles'], key=lambda t: (t['row1'] - t['row0']) * (t['col1'] - t['col0']))
+        budget = tile_budget(parse_size(memory), largest, configuration.kernel(config))
+        plan_rows(budget, largest['row1'] - largest['row0'], largest['col1'] - largest['col0'],
+                  configuration.kernel(config), provenance=config['run']['qa'], writes=0)
+        mem = ' --mem=' + slurm_memory(memory)  # the budget, the interpreter and the GDAL libraries
+    manifest['raster'] = config['inputs']['basemap']
+    write_manifest(tiling['manifest'], manifest)
+    print('Valid pixels: ' + str(int(counts.sum())))
+    print('Planned tiles: ' + str(len(manifest['tiles'])) + ', imbalance (max/mean): %.2f' % imbalance(manifest))
+    print('Submit with: sbatch --array=0-' + str(len(manifest['tiles']) - 1) + mem + ' run_main_HPC.sh')
+
+
+def run_tile(config, task):
+    from .hpc import run_tile
+    inputs, run, tiles = config['inputs'], config['run'], config['tiles']
+    run_tile(task, inputs['basemap'], inputs['landuse'], inputs['expert_table'], config['tiling']['manifest'],
+             tiles['dir'], configuration.kernel(config), inputs['overlay'], run['qa'], tiles['tiled'],
+             tiles['compress'], run['block_rows'], run['scratch'], run['progress'], run['memory'])
+
+
+def run_local(config):
+    from .local import SHARED_DIR, run as run_local
+    from .scheduler import run as run_budget
+    inputs, run, output = config['inputs'], config['run'], config['output']
+    options = configuration.run_options(config)  # as the options of python -m lulcdown.local
+    if run['memory']:
+        run_budget(inputs['basemap'], inputs['landuse'], inputs['expert_table'], output['path'], run['memory'],
+                   **options)
+        return
+    run_local(inputs['basemap'], inputs['landuse'], inputs['expert_table'], output['path'], run['workers'],
+              block_rows=run['block_rows'], shared_dir=run['scratch'] or SHARED_DIR, **options)
+
+
+def status(config, submit=None):
+    from .checkpoint import rerun, tile_states
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .tiling import read_manifest
+    inputs = config['inputs']
+    manifest = read_manifest(config['tiling']['manifest'])
+    band = open_raster(inputs['basemap']).GetRasterBand(1)
+    band2 = open_raster(inputs['landuse']).GetRasterBand(1)
+    table_hash = load(inputs['expert_table']).xls_hash  # checks the table, as the tasks do
+    overlay = Overlay.from_csv(inputs['overlay']) if inputs['overlay'] else None
+    rerun(tile_states(manifest, config['tiles']['dir'], band, band2, table_hash, configuration.kernel(config),
+                      overlay, config['run']['qa']), submit)
+
+
+def merge(config):
+    from .checkpoint import array_ranges
+    from .hpc import incomplete_tiles, merge
+    from .tiling import read_manifest
+    inputs = config['inputs']
+    manifest = read_manifest(config['tiling']['manifest'])  # tiles computed by the array tasks
+    tile_dir, output = config['tiles']['dir'], config['output']
+    # a preempted or timed out task leaves its tile partial, a tile computed with other inputs or settings is stale
+    incomplete = incomplete_tiles(manifest, tile_dir, inputs['basemap'], inputs['landuse'], inputs['expert_table'],
+                                  configuration.kernel(config), inputs['overlay'], config['run']['qa'])
+    if incomplete:
+        print('Incomplete or stale tiles: ' + array_ranges(incomplete))
+        print('Rerun them with: sbatch --array=' + array_ranges(incomplete) + ' run_main_HPC.sh')
+        sys.exit(1)
+    print('Merging ', len(manifest['tiles']), ' files ...')
+    path = merge(manifest, tile_dir, output['path'], output['vrt'], output['compress'], output['predictor'],
+                 output['overviews'], output['cog'], config['run']['qa'], output['tiled'], config['run']['memory'])
+    print('The raster ', path, ' was succesfully created!')
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m lulcdown', description='Downscaling of Swiss LCLU data')
+    parser.add_argument('--config', default=None,
+                        help='configuration file (default: ' + configuration.CONFIG + ' when it exists)')
+    parser.add_argument('--set', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help='override a setting of the configuration, e.g. run.workers=8, repeated for each')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    write = commands.add_parser('config', help='write the configuration, defaults included, to a file to edit')
+    write.add_argument('path', nargs='?', default=configuration.CONFIG, help='file to write (default: lulcdown.json)')
+    commands.add_parser('plan', help='plan the tiles of the array tasks with equal numbers of valid pixels')
+    tile = commands.add_parser('run-tile', help='downscale one tile of the manifest, e.g. in a SLURM array task')
+    tile.add_argument('task', type=int, nargs='?', default=None,
+                      help='index of the tile in the manifest (default: $SLURM_ARRAY_TASK_ID)')
+    commands.add_parser('run-local', help='downscale the whole raster on the cores of this computer')
+    check = commands.add_parser('status', help='find the tiles that are missing, incomplete or stale')
+    check.add_argument('--submit', default=None, metavar='SCRIPT', help='sbatch the tiles to rerun with this script')
+    commands.add_parser('merge', help='mosaic the complete tiles into the output raster')
+    args = parser.parse_args(argv)
+
+    try:
+        config = configuration.load(args.config, args.set)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == 'config':
+        configuration.write(args.path, config)
+    elif args.command == 'plan':
+        plan(config)
+    elif args.command == 'run-tile':
+        task = args.task
+        if task is None:
+            if 'SLURM_ARRAY_TASK_ID' not in os.environ:
+                parser.error('run-tile needs a tile index outside of a SLURM array task')
+            task = int(os.environ['SLURM_ARRAY_TASK_ID'])
+        run_tile(config, task)
+    elif args.command == 'run-local':
+        run_local(config)
+    elif args.command == 'status':
+        status(config, args.submit)
+    else:
+        merge(config)
+
+
+if __name__ == '__main__':
+    main()
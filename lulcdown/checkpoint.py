@@ -0,0 +1,202 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Checkpoint and resume of the HPC tiles of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import hashlib, json, os
+
+import numpy
+
+from . import __version__
+
+####################################################################################
+# A tile is complete when its marker (output_<id>.tif.done.json) exists. The marker
+# holds the signature of the tile: checksums of the BaseMap25 and Landuse100 pixels
+# it was computed from (the tile and its neighbours halo, whatever the blocks of the
+# files), hash of the expert table and IDW parameters. A tile without marker is
+# incomplete (preempted or timed out) and resumes from its last written group of rows
+# (output_<id>.tif.part.json); a marker with another signature is stale.
+# python -m lulcdown status checks the tiles with the inputs and kernel of lulcdown.json,
+# the same as the tasks; python -m lulcdown.checkpoint takes them as options instead.
+####################################################################################
+
+COMPLETE, MISSING, INCOMPLETE, STALE = 'complete', 'missing', 'incomplete', 'stale'
+
+
+def sha256_file(path):
+    """Hash of the content of a file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def checksum(data):
+    """Hash of an array, shape included."""
+    h = hashlib.sha256(str(data.shape).encode())
+    h.update(numpy.ascontiguousarray(data).tobytes())
+    return h.hexdigest()
+
+
+def signature(data, data2, table_hash, kernel, overlay=None, provenance=False):
+    """Signature of a tile computed from the BaseMap25 window data and the Landuse100 window data2 of the tile
+    and its neighbours halo (see halo_window)."""
+    sign = {'basemap': checksum(data), 'landuse': checksum(data2), 'expert_table': table_hash,
+            'kernel': [kernel.rangeXY, kernel.lissage, kernel.size, kernel.stride, kernel.row_origin,
+                       kernel.col_origin],
+            'version': __version__}
+    if kernel.distance_function != 'euclidean':
+        sign['kernel'].append(kernel.distance_function)
+    if overlay is not None:
+        sign['overlay'] = overlay.digest()  # Step 11 rules
+    if provenance:
+        sign['provenance'] = True  # the tile has its provenance raster
+    return sign
+
+
+def tile_inputs(band, band2, tile, kernel):
+    """BaseMap25 window of the tile and Landuse100 window with the neighbours halo, with its UL pixel."""
+    from .raster import read_window
+    row0, row1, col0, col1 = tile['row0'], tile['row1'], tile['col0'], tile['col1']
+    data = band.ReadAsArray(col0, row0, col1 - col0, row1 - row0)  # read only the chunk (BaseMap25)
+    data2, lu_row0, lu_col0 = read_window(band2, row0, row1, col0, col1, kernel.halo())  # chunk + neighbours
+    return data, data2, lu_row0, lu_col0
+
+
+def halo_window(data2, lu_row0, lu_col0, tile, kernel, rows, cols):
+    """Landuse100 pixels of the tile and its neighbours halo in the window data2 read at (lu_row0, lu_col0) of
+    the rows x cols raster, without the margin of the block-aligned read: the same pixels stored with other
+    blocks, compressed or prepared (lulcdown/prepare.py) give the same window and signature."""
+    from .raster import window
+    yoff, xoff, ysize, xsize = window(tile['row0'], tile['row1'], tile['col0'], tile['col1'], rows, cols, kernel.halo())
+    return data2[yoff - lu_row0:yoff - lu_row0 + ysize, xoff - lu_col0:xoff - lu_col0 + xsize]
+
+
+def marker_path(path):
+    return path + '.done.json'
+
+
+def progress_path(path):
+    return path + '.part.json'
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):  # missing or partially written
+        return None
+
+
+def _write(path, content):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(content, f)
+    os.replace(tmp, path)  # atomic, a preempted task never leaves a truncated marker
+
+
+def status(path, sign):
+    """State of the output tile at path for the signature sign."""
+    marker = _read(marker_path(path))
+    if marker is not None:
+        return COMPLETE if marker == sign and os.path.exists(path) else STALE
+    return INCOMPLETE if os.path.exists(path) else MISSING
+
+
+def resume_row(path, sign):
+    """Number of rows of the tile already written with the same signature (0 to start over)."""
+    progress = _read(progress_path(path))
+    if progress is None or progress['signature'] != sign or not os.path.exists(path):
+        return 0
+    return progress['rows']
+
+
+def record_progress(path, sign, rows):
+    """Record that the first rows of the tile are written and flushed."""
+    _write(progress_path(path), {'signature': sign, 'rows': rows})
+
+
+def mark_complete(path, sign):
+    _write(marker_path(path), sign)
+    if os.path.exists(progress_path(path)):
+        os.remove(progress_path(path))
+
+
+def tile_states(manifest, tile_dir, band, band2, table_hash, kernel, overlay=None, provenance=False):
+    """{state: IDs} of the tiles of the manifest in tile_dir, their signatures computed from the BaseMap25 and
+    Landuse100 bands, the hash of the expert table, the kernel, the Step 11 overlay and provenance as the
+    tasks do."""
+    from .merge import tile_path
+    states = {}
+    for tile in manifest['tiles']:
+        data, data2, lu_row0, lu_col0 = tile_inputs(band, band2, tile, kernel)
+        data2 = halo_window(data2, lu_row0, lu_col0, tile, kernel, band2.YSize, band2.XSize)
+        state = status(tile_path(tile_dir, tile), signature(data, data2, table_hash, kernel, overlay, provenance))
+        states.setdefault(state, []).append(tile['id'])
+    return states
+
+
+def array_ranges(ids):
+    """SLURM --array list of task IDs, e.g. 1,4-7,12."""
+    ranges = []
+    for i in sorted(ids):
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ','.join(str(a) if a == b else '%d-%d' % (a, b) for a, b in ranges)
+
+
+def rerun(states, submit=None):
+    """Print the number of tiles of each state and the sbatch command rerunning the tiles that are not complete,
+    submitted with the script submit; return the IDs of these tiles."""
+    import subprocess
+    for state in (COMPLETE, MISSING, INCOMPLETE, STALE):
+        print(state + ': ' + str(len(states.get(state, []))))
+    ids = sorted(states.get(MISSING, []) + states.get(INCOMPLETE, []) + states.get(STALE, []))
+    if not ids:
+        print('All the tiles are complete')
+        return ids
+    command = ['sbatch', '--array=' + array_ranges(ids), submit or 'run_main_HPC.sh']
+    print(' '.join(command))
+    if submit:
+        subprocess.check_call(command)
+    return ids
+
+
+def main():
+    import argparse
+    from . import config as configuration
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .tiling import MANIFEST, read_manifest
+    parser = argparse.ArgumentParser(description='Find the tiles that are missing, stale or incomplete and resubmit them')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('landuse', help='Landuse100 raster')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('--manifest', default=MANIFEST, help='tile manifest (default: tiles.json)')
+    parser.add_argument('--output', default='output', help='directory of the tiles (default: output)')
+    parser.add_argument('--submit', default=None, metavar='SCRIPT', help='sbatch the tiles to rerun with this script')
+    parser.add_argument('--overlay', default=None, metavar='CSV', help='Step 11 rules used by the tasks')
+    parser.add_argument('--qa', action='store_true', help='the tasks also write the provenance rasters')
+    configuration.add_arguments(parser, outputs=None)  # kernel of the tasks, as in lulcdown.json
+    args = parser.parse_args()
+
+    manifest = read_manifest(args.manifest)
+    band = open_raster(args.basemap).GetRasterBand(1)
+    band2 = open_raster(args.landuse).GetRasterBand(1)
+    table_hash = load(args.expert_table).xls_hash  # checks the table, as the tasks do
+    kernel = configuration.kernel(configuration.from_arguments(args))
+    overlay = Overlay.from_csv(args.overlay) if args.overlay else None
+    rerun(tile_states(manifest, args.output, band, band2, table_hash, kernel, overlay, args.qa), args.submit)
+
+
+if __name__ == '__main__':
+    main()
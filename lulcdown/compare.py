@@ -0,0 +1,230 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Streaming comparison and accuracy of downscaled Swiss LCLU data
+##########################################################
+
+# import libraries
+import json, os, sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+import numpy
+
+from .engine import BLOCK_ROWS, NODATA
+from .stats import RunStats
+
+####################################################################################
+# Two rasters on the same grid, e.g. the outputs of two versions of the engine or an
+# output and a reference map, are compared by groups of rows on a pool of processes,
+# each opening the rasters itself, so the memory stays at a few groups of rows:
+#   python -m lulcdown.compare LU-CH.tif LU-CH-1.4.5.tif --manifest tiles.json \
+#       --zones cantons.tif --changed changed.tif --json compare.json
+# The pixels where either raster holds an ignored value (255 = no data by default) are
+# not compared. The result holds the confusion matrix of the categories, their
+# producer's and user's accuracy, the overall agreement and kappa, the agreement by
+# zone (e.g. a raster of the cantons on the same grid) and by tile of the manifest.
+# The changed mask is 1 where the rasters differ, 0 where they agree and 255 where
+# they are not compared.
+# Landuse100 on the BaseMap25 grid holds every hectare as 4x4 pixels; with --sample 4
+# only one pixel of every hectare is compared, at --offset ROW COL inside the hectare,
+# which compares the output with the survey points of Landuse100.
+####################################################################################
+
+UNCOMPARED = 255  # value of the changed mask where the rasters are not compared
+
+_worker = {}  # rasters of the worker process, set by _init
+
+
+def _init(path_a, path_b, zones, ignore, sample, offset):
+    from .prepare import open_raster
+    _worker['a'] = open_raster(path_a).GetRasterBand(1)
+    _worker['b'] = open_raster(path_b).GetRasterBand(1)
+    _worker['zones'] = None if zones is None else open_raster(zones).GetRasterBand(1)
+    _worker['ignore'] = numpy.array(ignore, dtype=numpy.intp)
+    _worker['sample'] = sample
+    _worker['offset'] = offset
+
+
+def compare_block(a, b, ignore=(NODATA,), yoff=0, sample=None, offset=(0, 0), zones=None):
+    """Compare the block a with the block b, both at row yoff.
+
+    Returns the 256 x 256 confusion matrix (rows are the categories of a), the changed mask and, with a
+    zones block, the numbers of pixels compared and agreeing by zone value.
+    """
+    compared = ~(numpy.isin(a, ignore) | numpy.isin(b, ignore))
+    if sample:
+        rows = numpy.arange(yoff, yoff + a.shape[0])
+        cols = numpy.arange(a.shape[1])
+        compared &= ((rows - offset[0]) % sample == 0)[:, None] & ((cols - offset[1]) % sample == 0)[None, :]
+    pairs = a[compared].astype(numpy.intp) * 256 + b[compared]
+    confusion = numpy.bincount(pairs, minlength=256 * 256).reshape(256, 256)
+    changed = numpy.where(compared, a != b, UNCOMPARED).astype(numpy.uint8)
+    by_zone = None
+    if zones is not None:
+        zone = zones[compared].astype(numpy.intp)
+        agree = a[compared] == b[compared]
+        size = int(zone.max()) + 1 if len(zone) else 0
+        by_zone = (numpy.bincount(zone, minlength=size), numpy.bincount(zone, weights=agree, minlength=size))
+    return confusion, changed, by_zone
+
+
+def _run(yoff, nrows):
+    cols = _worker['a'].XSize
+    a = _worker['a'].ReadAsArray(0, yoff, cols, nrows)
+    b = _worker['b'].ReadAsArray(0, yoff, cols, nrows)
+    zones = None if _worker['zones'] is None else _worker['zones'].ReadAsArray(0, yoff, cols, nrows)
+    return (yoff,) + compare_block(a, b, _worker['ignore'], yoff, _worker['sample'], _worker['offset'], zones)
+
+
+class _Totals(object):
+    """Confusion matrix and counts by tile and zone summed over the blocks."""
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+        self.by_tile = numpy.zeros((len(tiles), 2), dtype=numpy.int64)  # compared and changed pixels of every tile
+        self.confusion = numpy.zeros((256, 256), dtype=numpy.int64)
+        self.zone_compared = numpy.zeros(0, dtype=numpy.int64)
+        self.zone_agree = numpy.zeros(0)
+
+    def add(self, yoff, confusion, mask, by_zone):
+        self.confusion += confusion
+        for t, tile in enumerate(self.tiles):
+            r0, r1 = max(yoff, tile['row0']), min(yoff + mask.shape[0], tile['row1'])
+            if r0 < r1:
+                window = mask[r0 - yoff:r1 - yoff, tile['col0']:tile['col1']]
+                self.by_tile[t] += (window != UNCOMPARED).sum(), (window == 1).sum()
+        if by_zone is not None:
+            n = max(len(self.zone_compared), len(by_zone[0]))
+            self.zone_compared = numpy.pad(self.zone_compared, (0, n - len(self.zone_compared)), mode='constant')
+            self.zone_agree = numpy.pad(self.zone_agree, (0, n - len(self.zone_agree)), mode='constant')
+            self.zone_compared[:len(by_zone[0])] += by_zone[0]
+            self.zone_agree[:len(by_zone[1])] += by_zone[1]
+
+
+def accuracy(confusion):
+    """Overall agreement, kappa and per category counts, producer's and user's accuracy of a confusion
+    matrix whose rows are the categories of the compared raster and columns the ones of the reference."""
+    total = confusion.sum()
+    agree = numpy.trace(confusion)
+    rows, cols = confusion.sum(axis=1), confusion.sum(axis=0)
+    expected = (rows * cols).sum() / float(total) ** 2 if total else 0.0
+    overall = agree / float(total) if total else 0.0
+    kappa = (overall - expected) / (1 - expected) if total and expected < 1 else 0.0
+    classes = {}
+    for c in numpy.flatnonzero(rows + cols):
+        diagonal = int(confusion[c, c])
+        classes[int(c)] = {'pixels': int(rows[c]), 'reference': int(cols[c]), 'agree': diagonal,
+                           'user': diagonal / float(rows[c]) if rows[c] else None,
+                           'producer': diagonal / float(cols[c]) if cols[c] else None}
+    return {'compared': int(total), 'agree': int(agree), 'agreement': overall, 'kappa': kappa, 'classes': classes}
+
+
+def compare(path_a, path_b, ignore=(NODATA,), zones=None, manifest=None, changed=None, sample=None, offset=(0, 0),
+            workers=None, block_rows=BLOCK_ROWS, every=None):
+    """Compare the raster at path_a with the raster at path_b on the same grid and return the result.
+
+    zones is a raster of zone values (e.g. the cantons) on the same grid, manifest a tile manifest; the
+    changed mask is written to the path changed when it is given.
+    """
+    from .prepare import open_raster
+    from .raster import check_aligned, create_output, write_rows
+
+    ds_a, ds_b = open_raster(path_a), open_raster(path_b)
+    check_aligned(ds_a, ds_b)
+    if zones is not None:
+        check_aligned(ds_a, open_raster(zones))
+    rows, cols = ds_a.RasterYSize, ds_a.RasterXSize
+    workers = workers or os.cpu_count()
+    stats = RunStats(rows, every, name=os.path.basename(path_a))
+    out = None
+    if changed is not None:
+        out = create_output(changed, cols, rows, ds_a.GetGeoTransform(), ds_a.GetProjection(), tiled=True,
+                            compress='DEFLATE')
+        out.GetRasterBand(1).SetNoDataValue(UNCOMPARED)
+    tiles = [] if manifest is None else manifest['tiles']
+    totals = _Totals(tiles)
+
+    def add(result):
+        yoff, confusion, mask, by_zone = result
+        totals.add(yoff, confusion, mask, by_zone)
+        if out is not None:
+            with stats.time('write'):
+                write_rows(out.GetRasterBand(1), mask, yoff)
+        stats.count('pixels', mask.size)
+        stats.rows_done(mask.shape[0])
+
+    init = (path_a, path_b, zones, list(ignore), sample, tuple(offset))
+    with ProcessPoolExecutor(workers, initializer=_init, initargs=init) as pool:
+        pending = set()
+        for yoff in range(0, rows, block_rows):
+            pending.add(pool.submit(_run, yoff, min(block_rows, rows - yoff)))
+            if len(pending) >= 2 * workers:  # bound the number of blocks waiting to be added
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    add(future.result())
+        for future in as_completed(pending):
+            add(future.result())
+    if out is not None:
+        with stats.time('write'):
+            out.FlushCache()  # save file
+        out = None  # close file
+
+    confusion = totals.confusion
+    result = accuracy(confusion)
+    result['changed'] = result['compared'] - result['agree']
+    result['confusion'] = [[int(i), int(j), int(confusion[i, j])] for i, j in zip(*numpy.nonzero(confusion))]
+    result['zones'] = {int(z): {'compared': int(totals.zone_compared[z]), 'agree': int(totals.zone_agree[z]),
+                                'agreement': totals.zone_agree[z] / float(totals.zone_compared[z])}
+                       for z in numpy.flatnonzero(totals.zone_compared)}
+    result['tiles'] = {int(tile['id']): {'compared': int(n), 'changed': int(c),
+                                         'agreement': 1 - c / float(n) if n else None}
+                       for tile, (n, c) in zip(tiles, totals.by_tile)}
+    result['run'] = stats.report(workers=workers)
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare two rasters of Swiss LCLU data on the same grid')
+    parser.add_argument('raster', help='raster to check, e.g. LU-CH.tif')
+    parser.add_argument('reference', help='reference raster on the same grid, e.g. the output of another version')
+    parser.add_argument('--ignore', type=int, nargs='+', default=[NODATA], help='values not compared (default: 255)')
+    parser.add_argument('--zones', default=None, help='raster of zones on the same grid, e.g. the cantons')
+    parser.add_argument('--manifest', default=None, help='tile manifest, for the agreement by tile')
+    parser.add_argument('--changed', default=None, metavar='TIF', help='write the changed pixels mask')
+    parser.add_argument('--sample', type=int, default=None, metavar='STEP', help='compare one pixel every STEP '
+                                                                                 'rows and columns, e.g. 4')
+    parser.add_argument('--offset', type=int, nargs=2, default=[0, 0], metavar=('ROW', 'COL'),
+                        help='position of the compared pixel inside the STEP x STEP cells')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all the cores)')
+    parser.add_argument('--json', default=None, help='write the result to this JSON file')
+    parser.add_argument('--progress', type=int, default=None, metavar='N', help='print throughput and ETA every N rows')
+    args = parser.parse_args()
+
+    manifest = None
+    if args.manifest:
+        from .tiling import read_manifest
+        manifest = read_manifest(args.manifest)
+    result = compare(args.raster, args.reference, args.ignore, args.zones, manifest, args.changed, args.sample,
+                     args.offset, args.workers, every=args.progress)
+    print('Compared pixels: ' + str(result['compared']) + ', changed: ' + str(result['changed']))
+    print('Agreement: %.4f  kappa: %.4f' % (result['agreement'], result['kappa']))
+    confused = sorted(result['confusion'], key=lambda entry: -entry[2])
+    for a, b, n in [entry for entry in confused if entry[0] != entry[1]][:10]:
+        print('  %3d instead of %3d  %12d' % (a, b, n))
+    worst = sorted(result['tiles'].items(), key=lambda item: item[1]['agreement'] if item[1]['compared'] else 1)
+    for tile, t in worst[:5]:
+        if t['changed']:
+            print('  tile %-5d agreement %.4f (%d changed)' % (tile, t['agreement'], t['changed']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=1)
+    if result['changed']:
+        sys.exit(1)  # the rasters differ, e.g. for regression checks
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Configuration of the runs of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import copy, json, os
+
+from .engine import BLOCK_ROWS
+from .kernel import DISTANCES, LISSAGE, RANGE_XY, SIZE, Kernel
+from .tiling import CELL, MANIFEST
+
+####################################################################################
+# One JSON file holds the inputs, the tiling, the execution and the outputs of every
+# mode of python -m lulcdown (plan, run-tile, run-local and merge), instead of paths
+# and settings written in the scripts. Every key is optional, a missing key keeps its
+# default below; python -m lulcdown config writes them all to a file to edit.
+# Paths are relative to the directory the command runs in, "$VAR" and "~" are expanded,
+# e.g. "scratch": "$TMPDIR" for the node-local disk of a cluster. The command lines of
+# the modules (python -m lulcdown.local, .scheduler, .epochs and .checkpoint) take the
+# same kernel and output settings as options (add_arguments), turned into the same
+# keyword arguments of the runs (run_options).
+####################################################################################
+
+CONFIG = 'lulcdown.json'  # default configuration file
+
+DEFAULTS = {
+    'inputs': {
+        'basemap': 'PRI09_25.tiff',  # BaseMap25, or its prepared raw file next to it
+        'landuse': 'AS09_72_25.tiff',  # Landuse100 on the BaseMap25 grid
+        'expert_table': 'expert_table_72cat_v4.xls',
+        'overlay': None,  # Step 11 CSV file of rules
+    },
+    'kernel': {'rangeXY': RANGE_XY, 'lissage': LISSAGE, 'size': SIZE, 'distance': 'euclidean'},
+    'tiling': {
+        'manifest': MANIFEST,
+        'tasks': 900,  # number of array tasks
+        'cell': CELL,
+        'regular': None,  # e.g. "30x30" for an equal grid of tiles instead
+    },
+    'run': {
+        'workers': None,  # processes of run-local (all the cores by default, 1 for a serial run)
+        'block_rows': BLOCK_ROWS,  # rows downscaled and written at once
+        'memory': None,  # e.g. "8G": run-local streams groups of rows sized to this budget in a single process,
+                         # with the reads and writes on background threads (lulcdown/scheduler.py); each task of
+                         # run-tile and the merge also keep to it, --mem being the budget plus 256M (see plan)
+        'scratch': None,  # temporary files: inputs shared by the workers of run-local (/dev/shm by default),
+                          # tiles of run-tile written there and moved to tile_dir once complete (in place by default);
+                          # a partial tile and its progress stay there, so on a disk wiped after each job, e.g.
+                          # $TMPDIR, a preempted tile restarts from its first row instead of resuming
+        'progress': 1024,  # print throughput and ETA every N rows
+        'qa': False,  # also write the decision case, score and margin
+    },
+    'tiles': {'dir': 'output', 'tiled': False, 'compress': None},
+    'output': {
+        'path': 'LU-CH.tif',
+        'vrt': False,  # merge only writes a VRT mosaic of the tiles, at path with a .vrt extension (LU-CH.vrt)
+        'tiled': True,
+        'compress': 'DEFLATE',
+        'predictor': True,
+        'overviews': True,
+        'cog': False,
+    },
+}
+
+ARGUMENTS = {('kernel', 'rangeXY'): 'range', ('kernel', 'lissage'): 'lissage', ('kernel', 'size'): 'size',
+             ('kernel', 'distance'): 'distance', ('inputs', 'overlay'): 'overlay', ('run', 'progress'): 'progress',
+             ('run', 'qa'): 'qa', ('output', 'tiled'): 'tiled', ('output', 'compress'): 'compress',
+             ('output', 'predictor'): 'predictor', ('output', 'overviews'): 'overviews', ('output', 'cog'): 'cog'}
+
+PATHS = {('inputs', 'basemap'), ('inputs', 'landuse'), ('inputs', 'expert_table'), ('inputs', 'overlay'),
+         ('tiling', 'manifest'), ('run', 'scratch'), ('tiles', 'dir'), ('output', 'path')}
+
+
+def _expand(path):
+    return path if path is None else os.path.expanduser(os.path.expandvars(path))
+
+
+def merge(config, updates):
+    """Copy of config updated with the {section: {key: value}} updates; raise a ValueError on an unknown key."""
+    config = copy.deepcopy(config)
+    for section, values in updates.items():
+        if section not in DEFAULTS or not isinstance(values, dict):
+            raise ValueError('Unknown configuration section %r, expected one of %s' % (section, ', '.join(DEFAULTS)))
+        for key, value in values.items():
+            if key not in DEFAULTS[section]:
+                raise ValueError('Unknown configuration key %s.%s' % (section, key))
+            config[section][key] = value
+    return config
+
+
+def parse_set(item):
+    """{section: {key: value}} of a SECTION.KEY=VALUE override, the value being JSON or else a string."""
+    name, sep, value = item.partition('=')
+    section, dot, key = name.partition('.')
+    if not sep or not dot:
+        raise ValueError('Invalid setting %r, expected SECTION.KEY=VALUE, e.g. run.workers=8' % item)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass  # a string, e.g. a path
+    return {section: {key: value}}
+
+
+def load(path=None, overrides=()):
+    """Configuration of the file at path (lulcdown.json when it exists by default) over the defaults,
+    updated with the SECTION.KEY=VALUE overrides."""
+    config = copy.deepcopy(DEFAULTS)
+    if path is None and os.path.exists(CONFIG):
+        path = CONFIG
+    if path is not None:
+        with open(path) as f:
+            config = merge(config, json.load(f))
+    for item in overrides:
+        config = merge(config, parse_set(item))
+    for section, key in PATHS:
+        config[section][key] = _expand(config[section][key])
+    return config
+
+
+def kernel(config):
+    """Kernel of the IDW parameters of the configuration."""
+    k = config['kernel']
+    return Kernel(k['rangeXY'], k['lissage'], k['size'], distance=k['distance'])
+
+
+def run_options(config, section='output'):
+    """Keyword arguments of lulcdown.local.run, lulcdown.scheduler.run and lulcdown.epochs.run: kernel, Step 11
+    overlay, progress and provenance of the configuration, written as the outputs of its section."""
+    output = config[section]
+    return {'kernel': kernel(config), 'overlay': config['inputs']['overlay'], 'every': config['run']['progress'],
+            'provenance': config['run']['qa'], 'tiled': output['tiled'], 'compress': output['compress'],
+            'predictor': output['predictor'], 'overviews': output['overviews'], 'cog': output['cog']}
+
+
+def add_arguments(parser, outputs='the output'):
+    """Add the kernel options and, unless outputs is None, the options of the outputs (striped and uncompressed
+    by default, as before) to the parser of a module command line."""
+    parser.add_argument('--range', type=float, default=RANGE_XY, help='rangeXY of the IDW (default: 18.38)')
+    parser.add_argument('--lissage', type=float, default=LISSAGE, help='lissage of the IDW (default: 0.1)')
+    parser.add_argument('--size', type=int, default=SIZE, help='size of the neighbours window (default: 6)')
+    parser.add_argument('--distance', default='euclidean', choices=DISTANCES, help='distance function of the IDW')
+    if outputs is None:
+        return
+    parser.add_argument('--tiled', action='store_true', help='write ' + outputs + ' tiled')
+    parser.add_argument('--compress', default=None, help='GeoTIFF compression, e.g. DEFLATE or ZSTD')
+    parser.add_argument('--predictor', action='store_true', help='compress with the horizontal predictor')
+    parser.add_argument('--overviews', action='store_true', help='add internal overviews, filled while writing')
+    parser.add_argument('--cog', action='store_true',
+                        help='write ' + outputs + ' as Cloud Optimized GeoTIFF with overviews')
+    parser.add_argument('--progress', type=int, default=None, metavar='N', help='print throughput and ETA every N rows')
+    parser.add_argument('--overlay', default=None, metavar='CSV', help='Step 11 rules of the linear features')
+    parser.add_argument('--qa', action='store_true',
+                        help='also write the decision case, score and margin of ' + outputs + ' (OUTPUT_qa.tif)')
+
+
+def from_arguments(args):
+    """Configuration of the options of a module command line (see add_arguments) over the defaults."""
+    updates = {}
+    for (section, key), name in ARGUMENTS.items():
+        if hasattr(args, name):
+            updates.setdefault(section, {})[key] = getattr(args, name)
+    return merge(DEFAULTS, updates)
+
+
+def write(path, config=DEFAULTS):
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=1)
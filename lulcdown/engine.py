@@ -0,0 +1,316 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Vectorized downscaling engine for Swiss LCLU data
+##########################################################
+
+# import libraries
+import numpy
+
+from .kernel import Kernel
+from .provenance import CASE_DEFAULT, CASE_IDW, CASE_OVERLAY, CASE_SINGLE, CASE_UNIQUE
+from .stats import NO_STATS
+
+####################################################################################
+# Step 4: Visit each BaseMap25 pixel
+# Step 10: Loop from point 4 to 11 with next BaseMap25 pixel
+# The whole block is processed at once with array operations instead of a per-pixel loop,
+# giving the same class assignments as the per-pixel algorithm
+####################################################################################
+
+NODATA = 255  # nodata value of BaseMap25 and Landuse100 (0 = country mask in BaseMap25)
+CHUNK = 16384  # number of pixels processed together, bounds the memory of the (pixels, 36) arrays
+BLOCK_ROWS = 256  # number of rows downscaled and written at once by downscale_rows
+DEFAULT_KERNEL = Kernel()  # 6x6 neighbours, rangeXY = 18.38, lissage = 0.1
+
+
+def downscale(data, data2, table, row0=0, col0=0, rows=None, cols=None, lu_row0=0, lu_col0=0, kernel=None,
+              chunk=CHUNK, out=None, stats=None, overlay=None, qa=None):
+    """Downscale a block of BaseMap25 pixels and return the assigned Landuse100 classes.
+
+    data is the BaseMap25 block whose UL pixel is (row0, col0) in the full raster, data2 the Landuse100
+    array whose UL pixel is (lu_row0, lu_col0); it must cover the neighbours of the block inside the
+    rows x cols raster (the full raster by default). kernel sets the neighbours window and the IDW
+    parameters (6x6 neighbours, rangeXY = 18.38 and lissage = 0.1 by default). The result is written in
+    out when a preallocated uint8 array of the shape of data is given. stats collects the time by stage and
+    the pixels by decision case (see lulcdown/stats.py). overlay is the Step 11 remap of the categories by
+    BaseMap25 value (see lulcdown/overlay.py), applied to the result. qa is a Provenance of the shape of
+    data filled with the decision case, winning score and margin of every pixel (see lulcdown/provenance.py).
+    """
+    if rows is None:
+        rows, cols = data2.shape
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    if stats is None:
+        stats = NO_STATS
+    if out is None:
+        out = numpy.zeros(data.shape, dtype=numpy.uint8)
+    else:
+        out[...] = 0  # 0 wherever no category is assigned
+    if qa is not None:
+        qa.reset()
+
+    py, px, value, case2, case3 = _lookup(data, table, stats)
+    _assign(out, data, py, px, value, case2, case3, table, stats, qa)
+    for start in range(0, len(case3), chunk):
+        idx = case3[start:start + chunk]
+        decided = _decide(value[idx], py[idx] + row0, px[idx] + col0, data2, table, rows, cols, lu_row0, lu_col0,
+                          kernel, stats, qa is not None)
+        out[py[idx], px[idx]] = _record(qa, py[idx], px[idx], decided)
+    _overlay(overlay, data, out, stats, qa)
+    return out
+
+
+def downscale_rows(data, data2, table, row0=0, col0=0, rows=None, cols=None, lu_row0=0, lu_col0=0, kernel=None,
+                   block_rows=BLOCK_ROWS, stats=None, overlay=None, qa=None):
+    """Downscale the block by groups of block_rows rows and yield (row offset in the block, result).
+
+    The results share one preallocated buffer, so each one must be written before asking for the next;
+    the rows are counted as done in stats once the next result is asked for. When a Provenance of
+    block_rows x the columns of data is given as qa, its first rows hold the provenance of each result.
+    """
+    if stats is None:
+        stats = NO_STATS
+    buffer = numpy.empty((min(block_rows, data.shape[0]), data.shape[1]), dtype=numpy.uint8)
+    for yoff in range(0, data.shape[0], block_rows):
+        block = data[yoff:yoff + block_rows]
+        yield yoff, downscale(block, data2, table, row0 + yoff, col0, rows, cols, lu_row0, lu_col0, kernel,
+                              out=buffer[:block.shape[0]], stats=stats, overlay=overlay,
+                              qa=None if qa is None else qa.block(block.shape[0]))
+        stats.rows_done(block.shape[0])
+
+
+def downscale_epochs(datas, data2s, table, row0=0, col0=0, rows=None, cols=None, lu_row0=0, lu_col0=0,
+                     kernel=None, chunk=CHUNK, outs=None, stats=None, overlay=None, qas=None):
+    """Downscale the same block for several epochs and return the list of their results.
+
+    datas and data2s hold the BaseMap25 block and the Landuse100 array of each epoch, all on the same grid
+    and windows (see downscale). Each result is the one of downscale on its epoch, but the positions of the
+    neighbours and their IDW are computed once for the pixels of all the epochs, and epochs given the same
+    BaseMap25 array share its expert table lookup. qas holds the Provenance of each epoch (see downscale).
+    """
+    if rows is None:
+        rows, cols = data2s[0].shape
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    if stats is None:
+        stats = NO_STATS
+    if outs is None:
+        outs = [numpy.zeros(data.shape, dtype=numpy.uint8) for data in datas]
+    else:
+        for out in outs:
+            out[...] = 0  # 0 wherever no category is assigned
+    if qas is None:
+        qas = [None] * len(datas)
+    for qa in qas:
+        if qa is not None:
+            qa.reset()
+
+    lookups = {}
+    case3 = numpy.zeros((len(datas),) + datas[0].shape, dtype=bool)  # case 3 pixels of each epoch
+    for e, data in enumerate(datas):
+        if id(data) not in lookups:
+            lookups[id(data)] = _lookup(data, table, stats)
+        py, px, value, case2, c3 = lookups[id(data)]
+        _assign(outs[e], data, py, px, value, case2, c3, table, stats, qas[e])
+        case3[e, py[c3], px[c3]] = True
+
+    uy, ux = numpy.nonzero(case3.any(axis=0))  # case 3 pixels of any epoch
+    for start in range(0, len(uy), chunk):
+        cy, cx = uy[start:start + chunk], ux[start:start + chunk]
+        with stats.time('gather'):
+            iy, ix, inside = _positions(cy + row0, cx + col0, data2s[0].shape, rows, cols, lu_row0, lu_col0, kernel)
+        IDW = kernel.idw(cy + row0, cx + col0)
+        for e in range(len(datas)):
+            sel = case3[e, cy, cx]
+            if sel.any():
+                decided = _choose(datas[e][cy[sel], cx[sel]], iy[sel], ix[sel], inside[sel], IDW[sel], data2s[e],
+                                  table, stats, qas[e] is not None)
+                outs[e][cy[sel], cx[sel]] = _record(qas[e], cy[sel], cx[sel], decided)
+    for data, out, qa in zip(datas, outs, qas):
+        _overlay(overlay, data, out, stats, qa)
+    return outs
+
+
+def downscale_sweep(data, data2, table, kernels, row0=0, col0=0, rows=None, cols=None, lu_row0=0, lu_col0=0,
+                    chunk=CHUNK, outs=None, stats=None):
+    """Downscale the same block with several kernels (IDW parameters) and return the list of their results.
+
+    Each result is the one of downscale with its kernel, but the expert table lookup is done once and the
+    neighbours of the case 3 pixels are gathered once for all the kernels sharing a neighbours window; the
+    sums of IDW of all these kernels are then accumulated together. The data2 window must cover the
+    neighbours of every window (see downscale). The case 3 pixels are counted once in stats.
+    """
+    if rows is None:
+        rows, cols = data2.shape
+    if stats is None:
+        stats = NO_STATS
+    if outs is None:
+        outs = [numpy.zeros(data.shape, dtype=numpy.uint8) for kernel in kernels]
+
+    py, px, value, case2, case3 = _lookup(data, table, stats)
+    _assign(outs[0], data, py, px, value, case2, case3, table, stats)
+    for out in outs[1:]:
+        out[...] = outs[0]  # same case 2 pixels for every kernel
+
+    windows = {}  # kernels by neighbours window
+    for s, kernel in enumerate(kernels):
+        windows.setdefault(kernel.window(), []).append(s)
+    for first, members in enumerate(windows.values()):
+        kernel = kernels[members[0]]
+        step = max(1, chunk // len(members))  # bounds the memory of the (kernels, pixels, categories) sums
+        for start in range(0, len(case3), step):
+            idx = case3[start:start + step]
+            yy, xx = py[idx] + row0, px[idx] + col0
+            with stats.time('gather'):
+                iy, ix, inside = _positions(yy, xx, data2.shape, rows, cols, lu_row0, lu_col0, kernel)
+                lu, acceptable = _gather(value[idx], iy, ix, inside, data2, table)
+            with stats.time('score'):
+                IDW = numpy.stack([kernels[s].idw(yy, xx) for s in members])  # (kernels, pixels, neighbours)
+                pixelValue, found, scores = _score(value[idx], lu, acceptable, IDW, table)
+            for s, values in zip(members, pixelValue):
+                outs[s][py[idx], px[idx]] = values
+            if first == 0:
+                stats.count('case3_default', (found == 0).sum())
+                stats.count('case3_single', (found == 1).sum())
+                stats.count('case3_idw', (found > 1).sum())
+    return outs
+
+
+def _lookup(data, table, stats):
+    """Valid pixels of the block, their values, which of them are case 2 and the indices of the case 3 ones."""
+    with stats.time('lookup'):
+        valid = (data > 0) & (data < NODATA)  # 0=country mask and 255=no data are left untouched
+        py, px = numpy.nonzero(valid)
+        value = data[py, px]
+
+        ##############################################################################################################
+        # Step 5: According to expert system table, select those categories that could be elected for the current pixel
+        ##############################################################################################################
+        case2 = table.case2[value]  # unique value case; assign the only value possible in LU100
+        case3 = numpy.flatnonzero(table.case3[value])  # case with possible value (1) and (3); (3) = default choice
+    return py, px, value, case2, case3
+
+
+def _assign(out, data, py, px, value, case2, case3, table, stats, qa=None):
+    """Assign the case 2 pixels and count the pixels of the block."""
+    with stats.time('lookup'):
+        out[py[case2], px[case2]] = table.first2[value[case2]]
+        if qa is not None:
+            qa.set(py[case2], px[case2], CASE_UNIQUE)
+    stats.count('pixels', data.size)
+    stats.count('valid', len(value))
+    stats.count('case2', case2.sum())
+    stats.count('unassigned', len(value) - case2.sum() - len(case3))
+
+
+def _overlay(overlay, data, out, stats, qa=None):
+    """Step 11: replace the categories wherever BaseMap25 holds a linear feature."""
+    if overlay is not None:
+        with stats.time('overlay'):
+            before = None if qa is None else out.copy()
+            stats.count('overlay', overlay.apply(data, out))
+            if qa is not None:
+                qa.case[out != before] = CASE_OVERLAY
+
+
+def _record(qa, py, px, decided):
+    """Categories decided by _choose; their provenance is recorded in qa when it is given."""
+    if qa is None:
+        return decided
+    pixelValue, case, score, margin = decided
+    qa.set(py, px, case, score, margin)
+    return pixelValue
+
+
+def _decide(value, yy, xx, data2, table, rows, cols, lu_row0, lu_col0, kernel, stats=NO_STATS, provenance=False):
+    """Steps 6 to 9 for the case 3 pixels at global positions (yy, xx)."""
+    with stats.time('gather'):
+        iy, ix, inside = _positions(yy, xx, data2.shape, rows, cols, lu_row0, lu_col0, kernel)
+    return _choose(value, iy, ix, inside, kernel.idw(yy, xx), data2, table, stats, provenance)
+
+
+def _positions(yy, xx, shape, rows, cols, lu_row0, lu_col0, kernel):
+    """Indices in the Landuse100 array of the neighbours of the pixels (yy, xx) and whether they are in the raster."""
+    ny, nx = kernel.neighbours(yy, xx)
+    inside = (ny >= 0) & (nx >= 0) & (ny < rows) & (nx < cols)
+    return numpy.clip(ny - lu_row0, 0, shape[0] - 1), numpy.clip(nx - lu_col0, 0, shape[1] - 1), inside
+
+
+def _choose(value, iy, ix, inside, IDW, data2, table, stats, provenance=False):
+    """Category of the case 3 pixels of the values value from their neighbours in data2 and their IDW;
+    with provenance, (categories, decision cases, winning scores, margins)."""
+    with stats.time('gather'):
+        lu, acceptable = _gather(value, iy, ix, inside, data2, table)
+    with stats.time('score'):
+        pixelValue, found, scores = _score(value, lu, acceptable, IDW, table)
+    stats.count('case3_default', (found == 0).sum())
+    stats.count('case3_single', (found == 1).sum())
+    stats.count('case3_idw', (found > 1).sum())
+    if not provenance:
+        return pixelValue
+    with stats.time('score'):
+        case = numpy.where(found == 0, CASE_DEFAULT, numpy.where(found == 1, CASE_SINGLE, CASE_IDW))
+        if scores.shape[1] > 1:
+            top = numpy.partition(scores, scores.shape[1] - 2, axis=1)[:, -2:]  # runner-up and winning scores
+        else:
+            top = numpy.concatenate([numpy.full_like(scores, -numpy.inf), scores], axis=1)
+        score = numpy.where(found > 0, top[:, 1], 0)
+        margin = score - numpy.where(found > 1, top[:, 0], 0)  # the winning score for a single category
+    return pixelValue, case, score, margin
+
+
+def _gather(value, iy, ix, inside, data2, table):
+    """Neighbour categories of the pixels of the values value and which of them are acceptable."""
+    ############################################################################################
+    # Step 6: Select among the 36 nearest Landuse100 neigbours those with acceptable categories
+    ############################################################################################
+    lu = numpy.where(inside, data2[iy, ix], NODATA)  # only pixel values inside Switzerland, nodata = 255
+    acceptable = (table.rank[value[:, None], lu] >= 0) & (lu < NODATA)
+    return lu, acceptable
+
+
+def _score(value, lu, acceptable, IDW, table):
+    """Steps 7 to 9, returns the categories, the number of acceptable categories found for each pixel and
+    the sums of IDW of the candidate categories (-inf for the ones not found).
+
+    IDW may hold several sets of inverse distances, (settings, pixels, neighbours); the categories and sums
+    then have a leading settings axis.
+    """
+    ########################################################################
+    # Step 7: Calculate the inverse distance to each neighbour
+    # Step 8: Sum up the inverse distances for each category
+    # Step 9: Assign the category with higher score to the BaseMap25 pixel
+    ########################################################################
+    # IDW holds the inverse distances, precomputed by position inside the Landuse100 cell (kernel.idw)
+
+    # accumulate the IDW by acceptable category, neighbour after neighbour as in the per-pixel loop so that
+    # the sums are bit-identical; the last column collects the neighbours that are not acceptable
+    codes = table.candidates
+    column = numpy.full(256, len(codes), dtype=numpy.intp)
+    column[codes] = numpy.arange(len(codes))
+    n = len(value)
+    pixel = numpy.arange(n)
+    idwClass = numpy.zeros(IDW.shape[:-2] + (n, len(codes) + 1))
+    present = numpy.zeros((n, len(codes) + 1), dtype=bool)
+    for k in range(lu.shape[1]):
+        c = numpy.where(acceptable[:, k], column[lu[:, k]], len(codes))
+        idwClass[..., pixel, c] += IDW[..., k]
+        present[pixel, c] = True
+    idwClass = idwClass[..., :-1]
+    present = present[:, :-1]
+
+    # highest sum of IDW; on equal sums the category coming last in the candidate list wins
+    scores = numpy.where(present, idwClass, -numpy.inf)
+    highIDW = scores.max(axis=-1)
+    rank = numpy.where(present & (idwClass == highIDW[..., None]), table.rank[value[:, None], codes[None, :]], -1)
+    pixelValue = codes[rank.argmax(axis=-1)]
+
+    # in case the acceptable value array is empty, assign the default (3) value
+    found = present.sum(axis=1)
+    empty = found == 0
+    pixelValue[..., empty] = table.first3[value[empty]]
+    return pixelValue, found, scores
@@ -0,0 +1,114 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Downscaling of several survey years of Swiss LCLU data in one pass
+##########################################################
+
+# import libraries
+import os
+
+from .engine import BLOCK_ROWS, DEFAULT_KERNEL, downscale_epochs
+from .stats import RunStats
+
+####################################################################################
+# A time series (e.g. 2009 and 2018) is downscaled in a single pass over the grid
+# instead of one full run per epoch. Each epoch is a (BaseMap25, Landuse100, output)
+# triple, all on the same grid. Groups of rows are read once per input raster (an
+# input shared by several epochs is read once), the positions and IDW of the
+# neighbours are computed once for all the epochs and every output is written.
+#   python -m lulcdown.epochs expert_table_72cat_v4.xls \
+#       --epoch PRI09_25.tiff AS09_72_25.tiff LU-CH-2009.tif \
+#       --epoch PRI18_25.tiff AS18_72_25.tiff LU-CH-2018.tif
+####################################################################################
+
+
+def run(epochs, expert_table, kernel=None, tiled=False, compress=None, block_rows=BLOCK_ROWS, every=None,
+        overlay=None, provenance=False, predictor=False, overviews=False, cog=False):
+    """Downscale the list of (BaseMap25, Landuse100, output) epochs sharing one grid in one pass.
+
+    The outputs are written as with lulcdown.local.run (tiled, compress, predictor, overviews and cog).
+    overlay is the Step 11 CSV file of rules, applied to every epoch (none by default). With provenance, the
+    decision case, winning score and margin of every epoch are written next to its output. The run report,
+    with the counts of all the epochs, is written next to the first output.
+    """
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .provenance import Provenance, create_qa
+    from .raster import check_aligned, cog_source, create_output, output_options, to_cog, window, write_rows
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+
+    rasters = {}  # every input raster is opened and read once
+    for basemap, landuse, output in epochs:
+        for path in (basemap, landuse):
+            if path not in rasters:
+                rasters[path] = open_raster(path)
+    first = rasters[epochs[0][0]]
+    for path, ds in rasters.items():
+        check_aligned(first, ds)  # one grid for all the epochs
+    rows, cols = first.RasterYSize, first.RasterXSize
+    print('BaseMap25 - Image Size: Rows:'+str(rows)+' Columns:'+str(cols)+', '+str(len(epochs))+' epochs')
+
+    stats = RunStats(rows, every, name=os.path.basename(epochs[0][2]))
+    table = load(expert_table)  # compiled expert table
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+    tiled, compress, overviews = output_options(tiled, compress, overviews, cog)  # a COG is tiled, compressed
+    outputs = [create_output(cog_source(output) if cog else output, cols, rows, first.GetGeoTransform(),
+                             first.GetProjection(), tiled, compress, predictor=predictor, overviews=overviews)
+               for basemap, landuse, output in epochs]
+    qas = outputs_qa = None
+    if provenance:
+        qas = [Provenance(block_rows, cols) for epoch in epochs]
+        outputs_qa = [create_qa(output, cols, rows, first.GetGeoTransform(), first.GetProjection(), tiled, compress)
+                      for basemap, landuse, output in epochs]
+    halo = kernel.halo()
+    for yoff in range(0, rows, block_rows):
+        h = min(block_rows, rows - yoff)
+        lu_row0, lu_col0, ysize, xsize = window(yoff, yoff + h, 0, cols, rows, cols, halo)  # rows and neighbours
+        with stats.time('read'):
+            blocks, windows = {}, {}
+            for basemap, landuse, output in epochs:
+                if basemap not in blocks:
+                    blocks[basemap] = rasters[basemap].GetRasterBand(1).ReadAsArray(0, yoff, cols, h)
+                if landuse not in windows:
+                    windows[landuse] = rasters[landuse].GetRasterBand(1).ReadAsArray(lu_col0, lu_row0, xsize, ysize)
+        results = downscale_epochs([blocks[basemap] for basemap, landuse, output in epochs],
+                                   [windows[landuse] for basemap, landuse, output in epochs], table, yoff, 0,
+                                   rows, cols, lu_row0, lu_col0, kernel, stats=stats, overlay=overlay,
+                                   qas=None if qas is None else [qa.block(h) for qa in qas])
+        with stats.time('write'):
+            for ds, result in zip(outputs, results):
+                write_rows(ds.GetRasterBand(1), result, yoff)  # write the assigned values and their overviews
+            if qas is not None:
+                for ds, qa in zip(outputs_qa, qas):
+                    qa.write(ds, yoff, nrows=h)
+        stats.rows_done(h)
+    with stats.time('write'):
+        for ds in outputs + (outputs_qa or []):
+            ds.FlushCache()  # save file
+        outputs = outputs_qa = None  # close files
+        if cog:
+            for basemap, landuse, output in epochs:
+                to_cog(cog_source(output), output, compress, predictor)
+    stats.write(epochs[0][2], epochs=[list(epoch) for epoch in epochs])
+
+
+def main():
+    import argparse
+    from . import config as configuration
+    parser = argparse.ArgumentParser(description='Downscale several epochs of Swiss LCLU data in one pass')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('--epoch', nargs=3, action='append', required=True, metavar=('BASEMAP', 'LANDUSE', 'OUTPUT'),
+                        help='BaseMap25, Landuse100 and output GeoTIFF of an epoch, repeated for each epoch')
+    configuration.add_arguments(parser, outputs='the outputs')  # kernel and output options, as in lulcdown.json
+    args = parser.parse_args()
+    run(args.epoch, args.expert_table, **configuration.run_options(configuration.from_arguments(args)))
+
+
+if __name__ == '__main__':
+    main()
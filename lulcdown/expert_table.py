@@ -0,0 +1,197 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Compiled expert table for the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os, warnings, zipfile
+
+import numpy
+
+##############################################################################################################
+# Step 5: According to expert system table, select those categories that could be elected for the current pixel
+# The expert table is read once and compiled into per-BaseMap25-class arrays instead of being scanned per pixel
+##############################################################################################################
+
+HEADER_ROW = 2  # row of the expert table holding the BaseMap25 values
+FIRST_ROW = 3  # first row holding a Landuse100 category (rows above are headers)
+CODE_COL = 1  # column holding the Landuse100 code
+LABEL_COL = 2  # column holding the Landuse100 label
+WEIGHTS = (1, 2, 3)  # 1 = possible choice, 2 = unique choice, 3 = default choice
+FORMAT = 1  # version of the compiled .npz table
+
+
+class ExpertTable(object):
+    """Acceptable Landuse100 codes and weights for every BaseMap25 value."""
+
+    def __init__(self, codes1, codes2, codes3, labels, order=None):
+        # codesN[value] is the array of Landuse100 codes with weight N for the BaseMap25 value,
+        # kept in the order of the rows of the expert table
+        self.codes1 = codes1
+        self.codes2 = codes2
+        self.codes3 = codes3
+        self.labels = labels  # Landuse100 code -> label
+        self.order = numpy.array(sorted(labels) if order is None else order, dtype=numpy.uint8)  # codes in row order
+        self.xls_hash = None  # SHA-256 of the Excel file it was compiled from, set by load
+        self.weights = numpy.zeros((256, 256), dtype=numpy.uint8)  # weights[BaseMap25, Landuse100], 0 = not acceptable
+        for weight, codes in zip(WEIGHTS, (codes1, codes2, codes3)):
+            for value in range(256):
+                self.weights[value, codes[value]] = weight
+
+        # per-BaseMap25-value decision tables used by the vectorized engine
+        count1 = numpy.array([len(c) for c in codes1])
+        count2 = numpy.array([len(c) for c in codes2])
+        count3 = numpy.array([len(c) for c in codes3])
+        self.case2 = count2 > 0  # unique value case, the first weight 2 code is assigned directly
+        self.case3 = (count1 > 0) & (count3 > 0) & (count2 == 0)  # possible values (1) and default choice (3)
+        self.first2 = numpy.array([c[0] if len(c) else 0 for c in codes2], dtype=numpy.uint8)
+        self.first3 = numpy.array([c[0] if len(c) else 0 for c in codes3], dtype=numpy.uint8)
+        # rank[value, code] is the position of an acceptable code in the candidate list (weight 1 codes then
+        # weight 3 codes), -1 otherwise; equal IDW sums are resolved in favour of the highest rank
+        self.rank = numpy.full((256, 256), -1, dtype=numpy.int16)
+        for value in range(256):
+            candidates = numpy.concatenate((codes1[value], codes3[value]))
+            self.rank[value, candidates] = numpy.arange(len(candidates))
+        self.candidates = numpy.flatnonzero((self.rank >= 0).any(axis=0)).astype(numpy.uint8)  # all acceptable codes
+
+    @classmethod
+    def from_weights(cls, order, weights, labels):
+        """Expert table of the weights[BaseMap25, Landuse100] matrix, order being the codes in row order."""
+        order = numpy.asarray(order, dtype=numpy.uint8)
+        arrays = [[order[weights[value, order] == w] for value in range(256)] for w in WEIGHTS]
+        return cls(arrays[0], arrays[1], arrays[2], labels, order)
+
+    @classmethod
+    def from_sheet(cls, sheet):
+        """Compile the expert table from an xlrd sheet; raise a ValueError when it is not consistent.
+
+        A BaseMap25 value with missing weights only gives a warning: its pixels are left unassigned at 0, as
+        in version 1.4.5, and counted as unassigned in the run reports.
+        """
+        problems, missing = [], []
+        order, labels = [], {}
+        for j in range(FIRST_ROW, sheet.nrows):
+            code = sheet.cell_value(j, CODE_COL)
+            if not isinstance(code, float) or code != int(code) or not 0 <= code < 255:
+                problems.append('row %d: invalid Landuse100 code %r' % (j + 1, code))
+                continue
+            if int(code) in labels:
+                problems.append('row %d: duplicate Landuse100 code %d' % (j + 1, code))
+            order.append(int(code))
+            labels[int(code)] = str(sheet.cell_value(j, LABEL_COL))
+        weights = numpy.zeros((256, 256), dtype=numpy.uint8)
+        values = set()
+        for i in range(sheet.ncols):  # iterate in columns to find the BaseMap25 values
+            value = sheet.cell_value(HEADER_ROW, i)
+            if not isinstance(value, float) or not 0 < value < 255:  # skip the CODE/Landuse 100 header columns
+                continue
+            if int(value) in values:
+                problems.append('column %d: duplicate BaseMap25 value %d' % (i + 1, value))
+            values.add(int(value))
+            for j in range(FIRST_ROW, sheet.nrows):  # read the identified column
+                weight = sheet.cell_value(j, i)
+                if weight in WEIGHTS:
+                    code = sheet.cell_value(j, CODE_COL)
+                    if isinstance(code, float) and 0 <= code < 255:
+                        weights[int(value), int(code)] = int(weight)
+                elif weight not in ('', 0):
+                    problems.append('row %d, column %d: invalid weight %r' % (j + 1, i + 1, weight))
+        for value in sorted(values):  # a pixel of this value is left at 0
+            w = set(weights[value])
+            if 2 not in w and not (1 in w and 3 in w):
+                missing.append(value)
+        if problems:
+            raise ValueError('Invalid expert table:\n  ' + '\n  '.join(problems))
+        if missing:
+            warnings.warn('Expert table: missing weights for the BaseMap25 values %s (a 2 or both a 1 and a 3 are '
+                          'needed), their pixels are left unassigned at 0' % ', '.join(str(v) for v in missing))
+        return cls.from_weights(order, weights, labels)
+
+    def unassigned(self):
+        """BaseMap25 values of the table with missing weights, whose pixels are left at 0."""
+        return numpy.flatnonzero(self.weights.any(axis=1) & ~self.case2 & ~self.case3)
+
+    @classmethod
+    def from_xls(cls, path):
+        """Compile the expert table from the first sheet of the Excel file."""
+        import xlrd
+        wb = xlrd.open_workbook(path)  # open the workbook
+        return cls.from_sheet(wb.sheet_by_index(0))
+
+    @classmethod
+    def from_npz(cls, path):
+        """Expert table saved by save."""
+        with numpy.load(path) as f:
+            if int(f['format']) != FORMAT:
+                raise ValueError(path + ' was saved in another format')
+            labels = dict(zip(f['label_codes'].tolist(), f['label_text'].tolist()))
+            table = cls.from_weights(f['order'], f['weights'], labels)
+            table.xls_hash = str(f['xls_hash'])
+        return table
+
+    def save(self, path):
+        """Save the compiled table to the .npz file at path, atomically."""
+        codes = sorted(self.labels)
+        tmp = '%s.%d.tmp' % (path, os.getpid())  # the array tasks may save it at the same time
+        with open(tmp, 'wb') as f:
+            numpy.savez(f, format=FORMAT, order=self.order, weights=self.weights,
+                        label_codes=numpy.array(codes, dtype=numpy.uint8),
+                        label_text=numpy.array([self.labels[c] for c in codes]), xls_hash=str(self.xls_hash))
+        os.replace(tmp, path)
+
+    def weight(self, value, code):
+        """Weight of the Landuse100 code for the BaseMap25 value (0 = not acceptable)."""
+        return self.weights[value, code]
+
+
+def cache_path(path):
+    """Compiled cache of the Excel file at path, next to it."""
+    return os.path.splitext(path)[0] + '.npz'
+
+
+def load(path, cache=None):
+    """Expert table of the Excel file at path.
+
+    It is read from its compiled cache (expert_table_72cat_v4.npz next to it by default) when the cache was
+    compiled from the same content, otherwise the Excel file is compiled, checked and the cache rewritten.
+    """
+    from .checkpoint import sha256_file
+    xls_hash = sha256_file(path)
+    if cache is None:
+        cache = cache_path(path)
+    try:
+        table = ExpertTable.from_npz(cache)
+        if table.xls_hash == xls_hash:
+            return table
+    except (IOError, OSError, ValueError, KeyError, zipfile.BadZipFile):  # missing, partial or older cache
+        pass
+    table = ExpertTable.from_xls(path)
+    table.xls_hash = xls_hash
+    try:
+        table.save(cache)
+    except (IOError, OSError):  # read-only directory, compiled again next time
+        pass
+    return table
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Check the expert table and compile it once for all the tasks')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('--cache', default=None, help='compiled table (default: .npz next to the expert table)')
+    args = parser.parse_args()
+    table = load(args.expert_table, args.cache)
+    print('Landuse100 codes: ' + str(len(table.labels)))
+    print('BaseMap25 values: ' + str(int(table.weights.any(axis=1).sum())) + ' (' + str(int(table.case2.sum()))
+          + ' with a unique value, ' + str(int(table.case3.sum())) + ' decided by the neighbours)')
+    if len(table.unassigned()):
+        print('Unassigned BaseMap25 values: ' + ', '.join(str(v) for v in table.unassigned()))
+    print('Compiled table: ' + (args.cache or cache_path(args.expert_table)))
+
+
+if __name__ == '__main__':
+    main()
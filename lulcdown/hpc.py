@@ -0,0 +1,184 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Array tasks and merge of the HPC execution of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os, shutil
+
+from .engine import BLOCK_ROWS, DEFAULT_KERNEL, downscale_rows
+from .tiling import MANIFEST, TILE_NAME
+
+####################################################################################
+# Each array task downscales the tile of the manifest matching its task ID with the
+# engine shared by every mode, checkpointed by groups of rows (lulcdown/checkpoint.py).
+# With a scratch directory, e.g. the node-local disk, the tile is written there and
+# moved to the tiles directory once complete, so the shared file system only sees
+# whole tiles; a partial tile stays there with its progress, so a preempted tile only
+# resumes when the scratch directory survives the job, otherwise it restarts from its
+# first row. The merge then mosaics the tiles strip by strip, once all of them are
+# complete with the signature of the current inputs and settings.
+####################################################################################
+
+
+def run_tile(task, basemap, landuse, expert_table, manifest=MANIFEST, tile_dir='output', kernel=None, overlay=None,
+             provenance=False, tiled=False, compress=None, block_rows=BLOCK_ROWS, scratch=None, every=None,
+             memory=None):
+    """Downscale the tile of index task of the manifest at path manifest into tile_dir.
+
+    The tile is skipped when already complete with the same inputs and resumes after its last written rows.
+    With scratch, the partial tile and its progress are kept in scratch, so it only resumes when scratch
+    was not wiped since the preempted task.
+    overlay is the Step 11 CSV file of rules; with provenance, the provenance raster of the tile is also
+    written (see lulcdown/provenance.py). With a memory budget (bytes or a size such as 768M), the groups of
+    rows and the GDAL block cache are sized to fit it instead of block_rows (see lulcdown/scheduler.py).
+    Returns False when the tile was already complete.
+    """
+    from osgeo import gdal  # import GDAL
+    from .checkpoint import (COMPLETE, STALE, halo_window, mark_complete, marker_path, progress_path, record_progress,
+                             resume_row, signature, status, tile_inputs)
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .provenance import Provenance, create_qa, qa_path
+    from .raster import check_aligned, create_output
+    from .scheduler import cache_bytes, parse_size, plan_rows, tile_budget
+    from .stats import RunStats, report_path
+    from .tiling import read_manifest
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+
+    # the rasters are read in place, each task only reads the window of its tile; when prepared beforehand
+    # (lulcdown/prepare.py) they are memory-mapped instead, shared by all the tasks of a node without decoding
+    raster = open_raster(basemap)  # open raster
+    LUrast = open_raster(landuse)
+    check_aligned(raster, LUrast)  # both rasters are read with the same row and column indices
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+
+    tile = read_manifest(manifest)['tiles'][task]  # the task ID is the index of the tile in the manifest
+    row0, row1, col0, col1 = tile['row0'], tile['row1'], tile['col0'], tile['col1']
+    print('Computing chunk %d (%d valid pixels)' % (task, tile['valid']))
+    print('rows: %d - %d' % (row0, row1))
+    print('cols: %d - %d' % (col0, col1))
+
+    if memory is not None:  # the windows of the tile, then groups of rows fitting the rest
+        budget = tile_budget(parse_size(memory), tile, kernel)
+        block_rows = plan_rows(budget, row1 - row0, col1 - col0, kernel, provenance=provenance, writes=0)
+        gdal.SetCacheMax(cache_bytes(budget))
+        print('groups of %d rows' % block_rows)
+
+    stats = RunStats(row1 - row0, every, name=task)
+    with stats.time('read'):
+        data, data2, lu_row0, lu_col0 = tile_inputs(raster.GetRasterBand(1), LUrast.GetRasterBand(1), tile, kernel)
+    table = load(expert_table)  # compiled expert table
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+
+    final = os.path.join(tile_dir, TILE_NAME.format(id=task))
+    ds_raster = final if scratch is None else os.path.join(scratch, TILE_NAME.format(id=task))
+    sign = signature(data, halo_window(data2, lu_row0, lu_col0, tile, kernel, rows, cols), table.xls_hash, kernel,
+                     overlay, provenance)
+    state = status(final, sign)
+    if state == COMPLETE:
+        print('Chunk already complete')
+        return False
+    if state == STALE:
+        os.remove(marker_path(final))  # computed from other inputs, not merged while it is rebuilt
+    start = resume_row(ds_raster, sign)  # rows already written
+    stats.total_rows = row1 - row0 - start
+
+    os.makedirs(os.path.dirname(ds_raster) or '.', exist_ok=True)
+    if start > 0:
+        print('Resuming at row %d' % (row0 + start))
+        ds = gdal.Open(ds_raster, gdal.GA_Update)  # keep the rows already written
+        ds_qa = gdal.Open(qa_path(ds_raster), gdal.GA_Update) if provenance else None
+    else:
+        ds = create_output(ds_raster, col1 - col0, row1 - row0, raster.GetGeoTransform(), raster.GetProjection(),
+                           tiled, compress, col0, row0)  # georeferenced at the tile position
+        ds_qa = create_qa(ds_raster, col1 - col0, row1 - row0, raster.GetGeoTransform(), raster.GetProjection(),
+                          tiled, compress, col0, row0) if provenance else None
+    qa = Provenance(block_rows, col1 - col0) if provenance else None  # filled with each group of rows
+
+    # each group of rows is downscaled in a preallocated buffer, written at once and checkpointed
+    for yoff, result in downscale_rows(data[start:], data2, table, row0 + start, col0, rows, cols, lu_row0, lu_col0,
+                                       kernel=kernel, block_rows=block_rows, stats=stats, overlay=overlay, qa=qa):
+        with stats.time('write'):
+            ds.GetRasterBand(1).WriteArray(result, 0, start + yoff)  # write the assigned values
+            ds.FlushCache()  # save file
+            if qa is not None:
+                qa.write(ds_qa, start + yoff, nrows=result.shape[0])
+                ds_qa.FlushCache()
+        record_progress(ds_raster, sign, start + yoff + result.shape[0])
+    ds = ds_qa = None  # close files
+    stats.write(ds_raster, tile=task, valid=tile['valid'], resumed_at=start)  # run report next to the tile
+    if ds_raster != final:
+        os.makedirs(tile_dir, exist_ok=True)
+        paths = [ds_raster, report_path(ds_raster)] + ([qa_path(ds_raster)] if provenance else [])
+        for path in paths:
+            shutil.move(path, os.path.join(tile_dir, os.path.basename(path)))  # whole tiles on the shared disk
+        os.remove(progress_path(ds_raster))
+    mark_complete(final, sign)  # the tile can be merged
+    return True
+
+
+def incomplete_tiles(manifest, tile_dir, basemap, landuse, expert_table, kernel=None, overlay=None,
+                     provenance=False):
+    """IDs of the tiles of the manifest that are not complete with these inputs: missing, left partial by a
+    preempted task or stale, i.e. marked complete but computed from other inputs or settings."""
+    from .checkpoint import COMPLETE, tile_states
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    band = open_raster(basemap).GetRasterBand(1)
+    band2 = open_raster(landuse).GetRasterBand(1)
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+    states = tile_states(manifest, tile_dir, band, band2, load(expert_table).xls_hash, kernel, overlay, provenance)
+    return sorted(i for state, ids in states.items() if state != COMPLETE for i in ids)
+
+
+def merge(manifest, tile_dir='output', output='LU-CH.tif', vrt=False, compress='DEFLATE', predictor=True,
+          overviews=True, cog=False, provenance=False, tiled=True, memory=None):
+    """Mosaic the tiles of the manifest in tile_dir into the output raster.
+
+    With vrt, only a VRT mosaic of the tiles is written, at output with the .vrt extension. The output is tiled
+    and compressed, with the predictor, overviews filled as the strips are written, or as a Cloud Optimized
+    GeoTIFF with cog; with provenance, the provenance rasters of the tiles are also merged. With a memory
+    budget, the GDAL block cache is sized to it (the strips take a few MB). Returns the path of the mosaic.
+    """
+    from osgeo import gdal  # import GDAL
+    from .merge import build_vrt, merge_tiles, vrt_path
+    from .provenance import create_qa
+    from .raster import cog_source, create_output, output_options, to_cog
+    from .scheduler import cache_bytes, parse_size
+
+    if vrt:
+        output = vrt_path(output)  # never VRT XML in a .tif
+        build_vrt(manifest, tile_dir, output)
+        return output
+    cols, rows = manifest['cols'], manifest['rows']
+    if memory is not None:
+        gdal.SetCacheMax(cache_bytes(parse_size(memory)))  # the blocks written and copied into the COG
+    tiled, compress, overviews = output_options(tiled, compress, overviews, cog)  # a COG is tiled, compressed
+    ds = create_output(cog_source(output) if cog else output, cols, rows, manifest['geotransform'],
+                       manifest['projection'], tiled=tiled, compress=compress, predictor=predictor,
+                       overviews=overviews)  # georeferenced from the manifest
+    merge_tiles(manifest, tile_dir, ds)  # write the tiles strip by strip
+    ds.GetRasterBand(1).SetNoDataValue(255)  # if you want these values transparent
+    ds.FlushCache()  # saves to disk
+    ds = None
+    if cog:
+        to_cog(cog_source(output), output, compress, predictor)  # copy with its overviews into the COG layout
+    if provenance:
+        ds = create_qa(output, cols, rows, manifest['geotransform'], manifest['projection'], tiled=tiled,
+                       compress=compress)  # decision case, winning score and margin
+        merge_tiles(manifest, tile_dir, ds, qa=True)
+        ds.FlushCache()
+        ds = None
+    return output
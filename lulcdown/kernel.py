@@ -0,0 +1,100 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Neighbours window and IDW kernel for the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import numpy
+
+############################################################################################
+# Step 6: the nearest Landuse100 neighbours form a size x size grid with a stride of 4 BaseMap25 pixels,
+# anchored at round(y/4)*4 - 9 and round(x/4)*4 - 10
+# Step 7: the inverse distance to each neighbour, 1 / (dist/rangeXY + lissage), dist being the
+# hypotenuse by default or, as tried by hand before, the sum (manhattan) or the largest (chebyshev)
+# of the row and column distances
+############################################################################################
+
+STRIDE = 4  # a Landuse100 pixel covers 4x4 BaseMap25 pixels
+SIZE = 6  # 6x6 nearest Landuse100 neighbours
+ROW_ORIGIN = -9  # UL row of the neighbours window relative to round(y/4)*4
+COL_ORIGIN = -10  # UL column of the neighbours window relative to round(x/4)*4
+RANGE_XY = 18.38  # sqrt (13^2+13^2) distance max 13 pixels
+LISSAGE = 0.1  # entre 0.01 et 1
+DISTANCES = ('euclidean', 'manhattan', 'chebyshev')
+
+
+class Kernel(object):
+    """Neighbours window and precomputed IDW of every neighbour.
+
+    Since the window is anchored on a multiple of the stride, the distances to the neighbours only depend
+    on the position of the pixel inside the Landuse100 cell. round() is half to even, so that position
+    repeats every 2 strides (y = 2 rounds down, y = 6 rounds up): the table is indexed by
+    (y mod 2*stride, x mod 2*stride) and holds the size*size IDW values in row by row order.
+    """
+
+    def __init__(self, rangeXY=RANGE_XY, lissage=LISSAGE, size=SIZE, stride=STRIDE, row_origin=None, col_origin=None,
+                 distance='euclidean'):
+        if distance not in DISTANCES:
+            raise ValueError('Unknown distance %r, expected one of %s' % (distance, ', '.join(DISTANCES)))
+        if row_origin is None:
+            row_origin = ROW_ORIGIN if size == SIZE else -((size - 1) * stride // 2)  # centre other window sizes
+        if col_origin is None:
+            col_origin = COL_ORIGIN if size == SIZE else -((size - 1) * stride // 2)
+        self.rangeXY = rangeXY
+        self.lissage = lissage
+        self.size = size
+        self.stride = stride
+        self.row_origin = row_origin
+        self.col_origin = col_origin
+        self.distance_function = distance
+        self.period = 2 * stride
+        offsets = numpy.arange(size) * stride
+        self.row_offsets = numpy.repeat(offsets, size)  # row by row, as in the per-pixel loop
+        self.col_offsets = numpy.tile(offsets, size)
+
+        # distances for every position inside the period, computed as in the per-pixel loop
+        position = numpy.arange(self.period)
+        ny, nx = self.neighbours(position, position)
+        dY = position[:, None] - ny  # (period, size*size)
+        dX = position[:, None] - nx
+        if distance == 'euclidean':
+            self.distance = numpy.sqrt(dX[None, :, :] ** 2 + dY[:, None, :] ** 2)  # hypotenuse, (period, period, n)
+        elif distance == 'manhattan':
+            self.distance = (numpy.abs(dX[None, :, :]) + numpy.abs(dY[:, None, :])).astype(float)
+        else:
+            self.distance = numpy.maximum(numpy.abs(dX[None, :, :]), numpy.abs(dY[:, None, :])).astype(float)
+        self.weights = 1 / (self.distance / rangeXY + lissage)
+
+    def neighbours(self, yy, xx):
+        """Rows and columns of the neighbours of each pixel, as (pixels, size*size) arrays."""
+        yRow = numpy.round(yy / self.stride).astype(numpy.intp) * self.stride + self.row_origin  # UL corner of the window
+        xCol = numpy.round(xx / self.stride).astype(numpy.intp) * self.stride + self.col_origin
+        return yRow[:, None] + self.row_offsets[None, :], xCol[:, None] + self.col_offsets[None, :]
+
+    def lines(self, yy, xx):
+        """Rows of the neighbours of each row yy and columns of the neighbours of each column xx, as (n, size)
+        arrays: the neighbours of pixel (yy[i], xx[j]) are all the pairs of a row of i and a column of j."""
+        offsets = numpy.arange(self.size) * self.stride
+        yRow = numpy.round(yy / self.stride).astype(numpy.intp) * self.stride + self.row_origin
+        xCol = numpy.round(xx / self.stride).astype(numpy.intp) * self.stride + self.col_origin
+        return yRow[:, None] + offsets[None, :], xCol[:, None] + offsets[None, :]
+
+    def window(self):
+        """Neighbours window; kernels with the same window read the same neighbours."""
+        return self.size, self.stride, self.row_origin, self.col_origin
+
+    def halo(self):
+        """Number of (top, bottom, left, right) pixels around a block where its neighbours can lie."""
+        position = numpy.arange(self.period)
+        ny, nx = self.neighbours(position, position)
+        dy = ny - position[:, None]
+        dx = nx - position[:, None]
+        return max(0, int(-dy.min())), max(0, int(dy.max())), max(0, int(-dx.min())), max(0, int(dx.max()))
+
+    def idw(self, yy, xx):
+        """IDW of the neighbours of each pixel, as a (pixels, size*size) array."""
+        return self.weights[yy % self.period, xx % self.period]
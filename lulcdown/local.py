@@ -0,0 +1,193 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Multi-core execution of the downscaling on a single computer
+##########################################################
+
+# import libraries
+import os, shutil, tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+import numpy
+
+from .engine import BLOCK_ROWS, downscale, downscale_rows
+from .prepare import RawBand
+from .provenance import Provenance
+from .stats import NO_STATS, RunStats
+
+####################################################################################
+# The raster is split into groups of rows that are downscaled on a pool of processes.
+# BaseMap25 and Landuse100 are read once into memory-mapped files that every worker
+# opens read-only, so the inputs are shared through the page cache instead of being
+# copied to each process; prepared raw inputs (lulcdown/prepare.py) are mapped as they
+# are. The groups of rows stream back in completion order. With a single worker the
+# rasters are read into memory and downscaled in this process, the serial version.
+####################################################################################
+
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None  # RAM-backed on Linux, default temp dir elsewhere
+
+_worker = {}  # inputs of the worker process, set by _init
+
+
+def _share(band, path):
+    """(path, offset, shape) of a memory-mapped file holding the whole band, read into path unless prepared."""
+    if isinstance(band, RawBand):
+        return band.path, band.offset, (band.YSize, band.XSize)  # mapped as it is, nothing to decode
+    data = numpy.memmap(path, dtype=numpy.uint8, mode='w+', shape=(band.YSize, band.XSize))
+    band.ReadAsArray(0, 0, band.XSize, band.YSize, buf_obj=data)  # read raster at once, without a copy
+    data.flush()
+    return path, 0, data.shape
+
+
+def _map(path, offset, shape):
+    return numpy.memmap(path, dtype=numpy.uint8, mode='r', offset=offset, shape=shape)
+
+
+def _init(shared, shared2, table, kernel, overlay, instrument, provenance):
+    _worker['data'] = _map(*shared)
+    _worker['data2'] = _map(*shared2)
+    _worker['table'] = table
+    _worker['kernel'] = kernel
+    _worker['overlay'] = overlay
+    _worker['instrument'] = instrument
+    _worker['provenance'] = provenance
+
+
+def _run(yoff, nrows):
+    data = _worker['data']
+    rows, cols = data.shape
+    stats = RunStats() if _worker['instrument'] else None  # sent back with the result
+    qa = Provenance(nrows, cols) if _worker['provenance'] else None
+    result = downscale(data[yoff:yoff + nrows], _worker['data2'], _worker['table'], yoff, 0, rows, cols,
+                       kernel=_worker['kernel'], stats=stats, overlay=_worker['overlay'], qa=qa)
+    return yoff, result, stats and stats.report(), qa and qa.arrays()
+
+
+def _result(future, stats, qa):
+    yoff, result, report, arrays = future.result()
+    if report is not None:
+        stats.add(report)  # the times of the workers are summed
+    if arrays is not None:
+        qa.load(arrays)
+    return yoff, result
+
+
+def downscale_pool(band, band2, table, kernel=None, workers=None, block_rows=BLOCK_ROWS, shared_dir=SHARED_DIR,
+                   stats=None, overlay=None, qa=None):
+    """Downscale the whole BaseMap25 band on a pool of workers processes (all the cores by default)
+    and yield (row offset, result) for each group of block_rows rows, in completion order.
+
+    The results are identical to downscale_rows on the whole raster. stats collects the times and counts
+    of the workers and the progress; overlay is the Step 11 remap applied by the workers. When a
+    Provenance of block_rows x the columns of the band is given as qa, its first rows hold the provenance
+    of each result. With workers=1 the results are computed in this process, in order.
+    """
+    workers = workers or os.cpu_count()
+    instrument = stats is not None
+    if stats is None:
+        stats = NO_STATS
+    rows = band.YSize
+    if workers == 1:  # serial, whole rasters in memory
+        with stats.time('read'):
+            data = band.ReadAsArray(0, 0, band.XSize, rows)
+            data2 = band2.ReadAsArray(0, 0, band2.XSize, band2.YSize)
+        for yoff, result in downscale_rows(data, data2, table, kernel=kernel, block_rows=block_rows, stats=stats,
+                                           overlay=overlay, qa=qa):
+            yield yoff, result
+        return
+    tmp = tempfile.mkdtemp(prefix='lulcdown-', dir=shared_dir)
+    try:
+        path, path2 = os.path.join(tmp, 'basemap25.u8'), os.path.join(tmp, 'landuse100.u8')
+        with stats.time('read'):
+            init = (_share(band, path), _share(band2, path2), table, kernel, overlay, instrument,
+                    qa is not None)  # the inputs are mapped read-only
+        with ProcessPoolExecutor(workers, initializer=_init, initargs=init) as pool:
+            pending = set()
+            for yoff in range(0, rows, block_rows):
+                pending.add(pool.submit(_run, yoff, min(block_rows, rows - yoff)))
+                if len(pending) >= 2 * workers:  # bound the number of results waiting to be written
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yoff, result = _result(future, stats, qa)
+                        yield yoff, result
+                        stats.rows_done(result.shape[0])
+            for future in as_completed(pending):
+                yoff, result = _result(future, stats, qa)
+                yield yoff, result
+                stats.rows_done(result.shape[0])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(basemap, landuse, expert_table, output, workers=None, kernel=None, tiled=False, compress=None, every=None,
+        overlay=None, provenance=False, predictor=False, overviews=False, cog=False, block_rows=BLOCK_ROWS,
+        shared_dir=SHARED_DIR):
+    """Downscale the BaseMap25 raster on the cores of this computer and write the output GeoTIFF.
+
+    The output is tiled and compressed on request, with the predictor and overviews, or written as a
+    Cloud Optimized GeoTIFF with cog (see lulcdown/raster.py). overlay is the Step 11 CSV file of rules
+    (none by default). With provenance, the decision case, winning score and margin of every pixel are
+    written next to the output (see lulcdown/provenance.py). The progress is printed every `every` rows
+    and the run report is written next to the output. The inputs shared by the workers are written in
+    shared_dir (/dev/shm on Linux) unless they are prepared.
+    """
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .provenance import create_qa
+    from .raster import check_aligned, cog_source, create_output, output_options, to_cog, write_rows
+
+    raster = open_raster(basemap)  # open raster, or its prepared raw file
+    LUrast = open_raster(landuse)
+    check_aligned(raster, LUrast)
+    print('BaseMap25 - Image Size: Rows:'+str(raster.RasterYSize)+' Columns:'+str(raster.RasterXSize))
+    stats = RunStats(raster.RasterYSize, every, name=os.path.basename(output))
+    table = load(expert_table)  # compiled expert table, from its cache when up to date
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+    tiled, compress, overviews = output_options(tiled, compress, overviews, cog)  # a COG is tiled, compressed
+    ds = create_output(cog_source(output) if cog else output, raster.RasterXSize, raster.RasterYSize,
+                       raster.GetGeoTransform(), raster.GetProjection(), tiled, compress, predictor=predictor,
+                       overviews=overviews)
+    qa = ds_qa = None
+    if provenance:
+        qa = Provenance(block_rows, raster.RasterXSize)
+        ds_qa = create_qa(output, raster.RasterXSize, raster.RasterYSize, raster.GetGeoTransform(),
+                          raster.GetProjection(), tiled, compress)
+    for yoff, result in downscale_pool(raster.GetRasterBand(1), LUrast.GetRasterBand(1), table, kernel, workers,
+                                       block_rows, shared_dir, stats=stats, overlay=overlay, qa=qa):
+        with stats.time('write'):
+            write_rows(ds.GetRasterBand(1), result, yoff)  # write the assigned values and their overviews
+            if qa is not None:
+                qa.write(ds_qa, yoff, nrows=result.shape[0])
+    with stats.time('write'):
+        ds.FlushCache()  # save file
+        if ds_qa is not None:
+            ds_qa.FlushCache()
+        ds = ds_qa = None  # close files
+        if cog:
+            to_cog(cog_source(output), output, compress, predictor)
+    stats.write(output, workers=workers or os.cpu_count())
+
+
+def main():
+    import argparse
+    from . import config as configuration
+    parser = argparse.ArgumentParser(description='Downscale Swiss LCLU data on the cores of a single computer')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('landuse', help='Landuse100 raster on the BaseMap25 grid')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('output', help='output GeoTIFF')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of processes (default: all the cores, 1 for a serial run)')
+    configuration.add_arguments(parser)  # kernel and output options, as the keys of lulcdown.json
+    args = parser.parse_args()
+    run(args.basemap, args.landuse, args.expert_table, args.output, args.workers,
+        **configuration.run_options(configuration.from_arguments(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# coding=utf-8
+##########################################################
+# Authors: Denisa Rodila, Gregory Giuliani
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Merge of HPC execution tiles for Downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os
+from xml.sax.saxutils import escape
+
+import numpy
+
+from .provenance import qa_path
+from .raster import BLOCK_SIZE, write_rows
+from .tiling import TILE_NAME
+
+####################################################################################
+# The mosaic is written by strips of rows aligned on the blocks of the output: each
+# strip is filled from the windows of the tiles crossing it and written once, so the
+# memory stays at one strip and every compressed block is written a single time.
+####################################################################################
+
+
+def tile_path(tile_dir, tile):
+    return os.path.join(tile_dir, TILE_NAME.format(id=tile['id']))
+
+
+def merge_tiles(manifest, tile_dir, ds, block_rows=BLOCK_SIZE, qa=False):
+    """Write the tiles of the manifest into the output dataset ds, strip by strip; with qa, the provenance
+    rasters of the tiles into the bands of the provenance raster ds (see lulcdown/provenance.py)."""
+    from osgeo import gdal  # import GDAL
+    rows, cols = manifest['rows'], manifest['cols']
+    bands = ds.RasterCount
+    strip = numpy.zeros((bands, block_rows, cols), dtype=numpy.float32 if qa else numpy.uint8)
+    for yoff in range(0, rows, block_rows):
+        h = min(block_rows, rows - yoff)
+        strip[:, :h] = 0  # pixels of no tile stay at 0, as in the tiles
+        for tile in manifest['tiles']:
+            r0, r1 = max(yoff, tile['row0']), min(yoff + h, tile['row1'])
+            if r0 >= r1:
+                continue
+            path = tile_path(tile_dir, tile)
+            file = gdal.Open(qa_path(path) if qa else path)
+            for b in range(bands):
+                dataf = file.GetRasterBand(b + 1).ReadAsArray(0, r0 - tile['row0'], tile['col1'] - tile['col0'],
+                                                              r1 - r0)
+                strip[b, r0 - yoff:r1 - yoff, tile['col0']:tile['col1']] = dataf  # place the window of the tile
+            file = None
+        for b in range(bands):
+            write_rows(ds.GetRasterBand(b + 1), strip[b, :h], yoff)  # and the overviews it covers
+
+
+def vrt_path(path):
+    """Path of the VRT mosaic of the output path, e.g. LU-CH.vrt for LU-CH.tif."""
+    return path if path.lower().endswith('.vrt') else os.path.splitext(path)[0] + '.vrt'
+
+
+def build_vrt(manifest, tile_dir, path, nodata=255):
+    """Write a GDAL VRT mosaic of the tiles, placed by their manifest position, without copying any pixel.
+
+    The tiles are georeferenced at their position, so gdalbuildvrt on the tiles gives the same mosaic.
+    """
+    root = os.path.dirname(os.path.abspath(path))
+    gt = ', '.join('%.17g' % v for v in manifest['geotransform'])
+    lines = ['<VRTDataset rasterXSize="%d" rasterYSize="%d">' % (manifest['cols'], manifest['rows']),
+             '  <SRS>%s</SRS>' % escape(manifest['projection']),
+             '  <GeoTransform>%s</GeoTransform>' % gt,
+             '  <VRTRasterBand dataType="Byte" band="1">',
+             '    <NoDataValue>%d</NoDataValue>' % nodata]
+    for tile in manifest['tiles']:
+        w, h = tile['col1'] - tile['col0'], tile['row1'] - tile['row0']
+        lines += ['    <SimpleSource>',
+                  '      <SourceFilename relativeToVRT="1">%s</SourceFilename>'
+                  % escape(os.path.relpath(os.path.abspath(tile_path(tile_dir, tile)), root)),
+                  '      <SourceBand>1</SourceBand>',
+                  '      <SrcRect xOff="0" yOff="0" xSize="%d" ySize="%d" />' % (w, h),
+                  '      <DstRect xOff="%d" yOff="%d" xSize="%d" ySize="%d" />' % (tile['col0'], tile['row0'], w, h),
+                  '    </SimpleSource>']
+    lines += ['  </VRTRasterBand>', '</VRTDataset>']
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
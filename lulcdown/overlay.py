@@ -0,0 +1,62 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Step 11: overlay of the linear features of BaseMap25 on the downscaled Swiss LCLU data
+##########################################################
+
+# import libraries
+import csv, hashlib
+
+import numpy
+
+##################################################################################################################
+# Step 11: [optional] Replace categories wherever river, road or train linear segments are available from BaseMap25
+# The categories of the linear features are removed from Landuse100 (Step 2), so they are put back where BaseMap25
+# holds a linear segment. The rules are compiled into a remap[BaseMap25, category] table applied with a single
+# lookup on every block right after its downscaling, in the same pass.
+# The rules are read from a CSV file with the columns basemap,landuse[,replaces], e.g.
+#   basemap,landuse,replaces
+#   30,64,          every pixel of BaseMap25 value 30 (e.g. river) becomes category 64
+#   31,62,42        pixels of BaseMap25 value 31 assigned to category 42 become category 62
+##################################################################################################################
+
+
+class Overlay(object):
+    """Remap of the assigned categories by BaseMap25 value."""
+
+    def __init__(self, rules):
+        # rules is a list of (BaseMap25 value, new category, replaced category or None for any category)
+        self.rules = [(int(b), int(l), None if r is None else int(r)) for b, l, r in rules]
+        self.table = numpy.tile(numpy.arange(256, dtype=numpy.uint8), (256, 1))  # identity, remap[value, category]
+        for basemap, landuse, replaces in sorted(self.rules, key=lambda rule: rule[2] is not None):
+            if not 0 < basemap < 255 or not 0 <= landuse < 255:
+                raise ValueError('Invalid overlay rule %r' % ((basemap, landuse, replaces),))
+            if replaces is None:
+                self.table[basemap, :] = landuse
+            else:  # specific rules override the rules for any category
+                self.table[basemap, replaces] = landuse
+
+    @classmethod
+    def from_csv(cls, path):
+        """Overlay of the rules of the CSV file at path."""
+        rules = []
+        with open(path) as f:
+            for row in csv.DictReader(f):
+                replaces = (row.get('replaces') or '').strip()
+                rules.append((row['basemap'], row['landuse'], replaces or None))
+        return cls(rules)
+
+    def digest(self):
+        """Hash of the remap table, part of the checkpoint signature of the tiles."""
+        return hashlib.sha256(self.table.tobytes()).hexdigest()
+
+    def apply(self, data, out):
+        """Remap in place the categories out assigned to the BaseMap25 block data; returns the number of
+        pixels changed."""
+        remapped = self.table[data, out]
+        changed = int((remapped != out).sum())
+        out[...] = remapped
+        return changed
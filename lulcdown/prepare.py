@@ -0,0 +1,146 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Raw memory-mapped inputs of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import json, os
+
+import numpy
+
+####################################################################################
+# BaseMap25 and Landuse100 are converted once into raw uint8 files: a header page
+# holding the size and georeferencing of the grid, then the pixels row by row. The
+# processes memory-map them, so all the processes of a node share the pages of the
+# page cache without decoding nor copying the GeoTIFFs. open_raster returns the raw
+# file next to a GeoTIFF when it was prepared (PRI09_25.tiff -> PRI09_25.u8), with the
+# interface of a GDAL dataset, so the scripts read either one the same way.
+#   python -m lulcdown.prepare PRI09_25.tiff AS09_72_25.tiff
+####################################################################################
+
+MAGIC = b'LULCRAW1'
+HEADER = 4096  # bytes before the pixels, one page so the pixels stay page aligned
+EXTENSION = '.u8'
+
+
+def raw_path(path):
+    """Prepared raw file of the raster at path."""
+    return os.path.splitext(path)[0] + EXTENSION
+
+
+class RawBand(object):
+    """Band 1 of a raw file, read like a GDAL band."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.offset = HEADER
+        self.YSize, self.XSize = header['rows'], header['cols']
+        self.array = numpy.memmap(path, dtype=numpy.uint8, mode='r', offset=HEADER, shape=(self.YSize, self.XSize))
+
+    def ReadAsArray(self, xoff=0, yoff=0, win_xsize=None, win_ysize=None, buf_obj=None):
+        win_xsize = self.XSize - xoff if win_xsize is None else win_xsize
+        win_ysize = self.YSize - yoff if win_ysize is None else win_ysize
+        window = self.array[yoff:yoff + win_ysize, xoff:xoff + win_xsize]
+        if buf_obj is None:
+            return numpy.array(window)  # a copy, as GDAL
+        buf_obj[...] = window
+        return buf_obj
+
+    def GetBlockSize(self):
+        return [self.XSize, 1]
+
+    def GetNoDataValue(self):
+        return None
+
+
+class RawDataset(object):
+    """Raw file read like a GDAL dataset."""
+
+    def __init__(self, path):
+        self.header = read_header(path)
+        self.RasterYSize, self.RasterXSize = self.header['rows'], self.header['cols']
+        self.RasterCount = 1
+        self._band = RawBand(path, self.header)
+
+    def GetRasterBand(self, i):
+        return self._band
+
+    def GetGeoTransform(self):
+        return tuple(self.header['geotransform'])
+
+    def GetProjection(self):
+        return self.header['projection']
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        head = f.read(HEADER)
+    if head[:len(MAGIC)] != MAGIC:
+        raise ValueError(path + ' is not a prepared raw raster')
+    return json.loads(head[len(MAGIC):].rstrip(b'\0').decode())
+
+
+def _source(path):
+    """Size and modification time of the source raster, to detect a raw file prepared from an older version."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def write_raw(source, path, block_rows=1024):
+    """Convert the band 1 of the raster at source into the raw file at path, block_rows rows at a time."""
+    from osgeo import gdal  # import GDAL
+    src = gdal.Open(source)
+    band = src.GetRasterBand(1)
+    rows, cols = src.RasterYSize, src.RasterXSize
+    header = {'rows': rows, 'cols': cols, 'geotransform': list(src.GetGeoTransform()),
+              'projection': src.GetProjection(), 'source': _source(source)}
+    head = MAGIC + json.dumps(header).encode()
+    if len(head) > HEADER:
+        raise ValueError('georeferencing too long for the header of ' + path)
+    tmp = path + '.tmp'
+    data = numpy.memmap(tmp, dtype=numpy.uint8, mode='w+', offset=HEADER, shape=(rows, cols))
+    for yoff in range(0, rows, block_rows):  # decode by strips
+        h = min(block_rows, rows - yoff)
+        band.ReadAsArray(0, yoff, cols, h, buf_obj=data[yoff:yoff + h])
+    data.flush()
+    del data
+    with open(tmp, 'r+b') as f:
+        f.write(head.ljust(HEADER, b'\0'))
+    os.replace(tmp, path)  # never leaves a partial raw file
+    return header
+
+
+def open_raster(path):
+    """GDAL-like dataset of the raster at path: its prepared raw file when there is an up to date one."""
+    raw = path if path.endswith(EXTENSION) else raw_path(path)
+    if os.path.exists(raw):
+        dataset = RawDataset(raw)
+        if raw != path and os.path.exists(path) and dataset.header['source'] != _source(path):
+            raise ValueError(raw + ' was prepared from another version of ' + path + ', prepare it again')
+        return dataset
+    from osgeo import gdal  # import GDAL
+    return gdal.Open(path)
+
+
+def main():
+    import argparse
+    from osgeo import gdal  # import GDAL
+    from .raster import check_aligned
+    parser = argparse.ArgumentParser(description='Convert BaseMap25 and Landuse100 into raw memory-mapped files')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('landuse', help='Landuse100 raster on the BaseMap25 grid')
+    args = parser.parse_args()
+
+    raster, LUrast = gdal.Open(args.basemap), gdal.Open(args.landuse)
+    check_aligned(raster, LUrast)  # the engine reads both rasters with the same row and column indices
+    for path in (args.basemap, args.landuse):
+        header = write_raw(path, raw_path(path))
+        print(raw_path(path) + ': Rows:' + str(header['rows']) + ' Columns:' + str(header['cols']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Decision provenance and confidence of the downscaled Swiss LCLU data
+##########################################################
+
+# import libraries
+import os
+
+import numpy
+
+####################################################################################
+# The engine knows for every pixel how its category was decided and how clear the
+# vote of the neighbours was. When a Provenance is given to the engine it is filled in
+# the same pass and written next to the output as a 3-band Float32 GeoTIFF, e.g.
+# LU-CH_qa.tif, with the same block-wise writes:
+#   band 1  decision case
+#             0 no category (country mask, no data or no decision in the expert table)
+#             1 unique value of weight 2 (case 2)
+#             2 single acceptable neighbour category (case 3)
+#             3 default value of weight 3, no acceptable neighbour (case 3)
+#             4 highest sum of IDW among several acceptable categories (case 3)
+#             5 replaced by the overlay of the linear features (Step 11)
+#   band 2  winning score, sum of the IDW of the assigned category (0 for cases 0, 1 and 3)
+#   band 3  margin, winning score minus the score of the runner-up category (the
+#           winning score when it is the single category, 0 on a tie)
+# Step 11 keeps the score and margin of the vote it overrides.
+####################################################################################
+
+CASE_NONE, CASE_UNIQUE, CASE_SINGLE, CASE_DEFAULT, CASE_IDW, CASE_OVERLAY = range(6)  # decision cases
+BANDS = ('case', 'score', 'margin')
+
+
+def qa_path(path):
+    """Provenance raster of the output raster at path, e.g. LU-CH_qa.tif for LU-CH.tif."""
+    root, ext = os.path.splitext(path)
+    return root + '_qa' + (ext or '.tif')
+
+
+class Provenance(object):
+    """Decision case, winning score and margin of every pixel of a block of rows x cols pixels."""
+
+    def __init__(self, rows, cols, arrays=None):
+        if arrays is None:
+            arrays = (numpy.zeros((rows, cols), dtype=numpy.uint8), numpy.zeros((rows, cols), dtype=numpy.float32),
+                      numpy.zeros((rows, cols), dtype=numpy.float32))
+        self.case, self.score, self.margin = arrays
+
+    @property
+    def shape(self):
+        return self.case.shape
+
+    def block(self, nrows):
+        """Provenance of the first nrows rows, sharing the arrays."""
+        return Provenance(nrows, self.shape[1], (self.case[:nrows], self.score[:nrows], self.margin[:nrows]))
+
+    def reset(self):
+        self.case[...] = CASE_NONE
+        self.score[...] = 0
+        self.margin[...] = 0
+
+    def set(self, py, px, case, score=0, margin=0):
+        self.case[py, px] = case
+        self.score[py, px] = score
+        self.margin[py, px] = margin
+
+    def load(self, arrays):
+        """Copy the (case, score, margin) arrays of a block, e.g. computed by a worker process."""
+        nrows = arrays[0].shape[0]
+        for mine, other in zip((self.case, self.score, self.margin), arrays):
+            mine[:nrows] = other
+
+    def arrays(self):
+        return self.case, self.score, self.margin
+
+    def write(self, ds, yoff, xoff=0, nrows=None):
+        """Write the first nrows rows (all by default) at (yoff, xoff) of the 3 bands of the dataset ds."""
+        for b, array in enumerate(self.arrays()):
+            ds.GetRasterBand(b + 1).WriteArray(array[:nrows], xoff, yoff)
+
+
+def create_qa(path, cols, rows, geotransform, projection, tiled=False, compress=None, xoff=0, yoff=0):
+    """Create the provenance raster of the output raster at path and return it open for writing."""
+    from osgeo import gdal  # import GDAL
+    from .raster import create_output
+    ds = create_output(qa_path(path), cols, rows, geotransform, projection, tiled, compress, xoff, yoff,
+                       bands=len(BANDS), data_type=gdal.GDT_Float32)
+    for b, name in enumerate(BANDS):
+        ds.GetRasterBand(b + 1).SetDescription(name)
+    return ds
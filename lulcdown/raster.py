@@ -0,0 +1,206 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Raster input/output for the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os
+
+import numpy
+from osgeo import gdal  # import GDAL
+
+####################################################################################
+# Outputs are striped and uncompressed by default, as before. For publication they can
+# be tiled, compressed (DEFLATE, ZSTD or LZW, with the horizontal predictor and the
+# blocks compressed on all the cores), written as BigTIFF when they may exceed 4 GB and
+# have internal overviews. The overviews are allocated at creation and filled with every
+# group of rows as it is written (nearest neighbour, which keeps the categories), so
+# they never need the mosaic to be read back. A Cloud Optimized GeoTIFF is then a copy
+# reusing those overviews.
+####################################################################################
+
+BLOCK_SIZE = 256  # internal tile size of tiled outputs, also the default number of rows written at once
+BIGTIFF_SIZE = 4000 * 1024 ** 2  # uncompressed size above which outputs are written as BigTIFF
+COG_COMPRESS = 'DEFLATE'  # compression of a Cloud Optimized GeoTIFF when none is given
+
+
+def creation_options(tiled=False, compress=None, blocksize=BLOCK_SIZE, predictor=False, bigtiff=False):
+    """GeoTIFF creation options; default striped and uncompressed, as before."""
+    options = []
+    if tiled:
+        options += ['TILED=YES', 'BLOCKXSIZE=' + str(blocksize), 'BLOCKYSIZE=' + str(blocksize)]
+    if compress:
+        options += ['COMPRESS=' + compress.upper(), 'NUM_THREADS=ALL_CPUS']  # blocks compressed in parallel
+        if predictor:
+            options += ['PREDICTOR=2']  # horizontal differencing
+    if bigtiff:
+        options += ['BIGTIFF=YES']
+    return options
+
+
+def offset_geotransform(geotransform, xoff, yoff):
+    """Geotransform of the window whose UL pixel is (yoff, xoff)."""
+    gt = list(geotransform)
+    gt[0] = geotransform[0] + xoff * geotransform[1] + yoff * geotransform[2]
+    gt[3] = geotransform[3] + xoff * geotransform[4] + yoff * geotransform[5]
+    return tuple(gt)
+
+
+def bounds(geotransform, row0, row1, col0, col1):
+    """(minx, miny, maxx, maxy) of the rows row0:row1 and columns col0:col1."""
+    xs, ys = [], []
+    for y in (row0, row1):
+        for x in (col0, col1):
+            xs.append(geotransform[0] + x * geotransform[1] + y * geotransform[2])
+            ys.append(geotransform[3] + x * geotransform[4] + y * geotransform[5])
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def check_aligned(raster, LUrast, tolerance=1e-6):
+    """Raise a ValueError unless the BaseMap25 and Landuse100 datasets share the same grid.
+
+    The geotransforms may differ by tolerance pixel; the projections are compared when both are set.
+    """
+    problems = []
+    if (raster.RasterXSize, raster.RasterYSize) != (LUrast.RasterXSize, LUrast.RasterYSize):
+        problems.append('size %dx%d vs %dx%d' % (raster.RasterYSize, raster.RasterXSize, LUrast.RasterYSize,
+                                                 LUrast.RasterXSize))
+    gt, gt2 = raster.GetGeoTransform(), LUrast.GetGeoTransform()
+    pixel = max(abs(gt[1]), abs(gt[5]))
+    if any(abs(a - b) > tolerance * pixel for a, b in zip(gt, gt2)):
+        problems.append('geotransform %s vs %s' % (tuple(gt), tuple(gt2)))
+    wkt, wkt2 = raster.GetProjection(), LUrast.GetProjection()
+    if wkt and wkt2 and wkt != wkt2:
+        from osgeo import osr
+        srs, srs2 = osr.SpatialReference(), osr.SpatialReference()
+        srs.ImportFromWkt(wkt)
+        srs2.ImportFromWkt(wkt2)
+        if not srs.IsSame(srs2):
+            problems.append('projection')
+    if problems:
+        raise ValueError('BaseMap25 and Landuse100 grids are not aligned: ' + ', '.join(problems))
+
+
+def create_output(path, cols, rows, geotransform, projection, tiled=False, compress=None, xoff=0, yoff=0, bands=1,
+                  data_type=gdal.GDT_Byte, predictor=False, overviews=False):
+    """Create the output GeoTIFF (one Byte band by default) and return it open for writing.
+
+    geotransform and projection are the ones of the full raster; the output covers its window starting at
+    pixel (yoff, xoff), so a tile is georeferenced at its own position. With overviews, the overviews are
+    allocated and filled by write_rows.
+    """
+    size = cols * rows * bands * gdal.GetDataTypeSize(data_type) // 8 * (4 / 3 if overviews else 1)
+    options = creation_options(tiled, compress, predictor=predictor, bigtiff=size > BIGTIFF_SIZE)
+    driver_tiff = gdal.GetDriverByName('GTiff')  # GeoTiff
+    ds = driver_tiff.Create(path, cols, rows, bands, data_type, options)  # create the output file
+    ds.SetGeoTransform(offset_geotransform(geotransform, xoff, yoff))  # get the coordinate system
+    ds.SetProjection(projection)  # get the projection
+    factors = overview_factors(rows, cols) if overviews else []
+    if factors:
+        ds.BuildOverviews('NONE', factors)  # allocated only, filled as the rows are written
+    return ds
+
+
+def overview_factors(rows, cols, blocksize=BLOCK_SIZE):
+    """Decimation factors 2, 4, 8... until the smallest overview fits in one block."""
+    factors, factor = [], 2
+    while max(rows, cols) > blocksize * factor // 2:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def _factor(band, overview):
+    """Decimation factor of an overview of the band."""
+    factor = 2
+    while factor < max(band.YSize, band.XSize):
+        if -(-band.YSize // factor) == overview.YSize and -(-band.XSize // factor) == overview.XSize:
+            return factor
+        factor *= 2
+    return max(1, int(round(band.XSize / float(overview.XSize))))  # overviews not built by create_output
+
+
+def write_rows(band, array, yoff):
+    """Write full-width rows at row yoff of the band, and the rows of its overviews that they cover.
+
+    An overview pixel takes the value of the source pixel at its centre (nearest neighbour, as gdaladdo),
+    so the groups of rows can be written in any order.
+    """
+    band.WriteArray(array, 0, yoff)
+    for i in range(band.GetOverviewCount()):
+        overview = band.GetOverview(i)
+        factor = _factor(band, overview)
+        centre = numpy.minimum(numpy.arange(overview.YSize) * factor + factor // 2, band.YSize - 1)
+        covered = numpy.flatnonzero((centre >= yoff) & (centre < yoff + array.shape[0]))
+        if len(covered) == 0:
+            continue
+        cols = numpy.minimum(numpy.arange(overview.XSize) * factor + factor // 2, band.XSize - 1)
+        overview.WriteArray(array[centre[covered] - yoff][:, cols], 0, int(covered[0]))
+
+
+def output_options(tiled=False, compress=None, overviews=False, cog=False):
+    """(tiled, compress, overviews) of an output; a Cloud Optimized GeoTIFF (cog) is always tiled, with
+    overviews, and compressed with COG_COMPRESS unless another compression is given."""
+    if cog:
+        return True, compress or COG_COMPRESS, True
+    return tiled, compress, overviews
+
+
+def cog_source(path):
+    """Tiled GeoTIFF with overviews written before its copy into the Cloud Optimized GeoTIFF at path."""
+    return path + '.tmp.tif'
+
+
+def to_cog(path, output, compress=COG_COMPRESS, predictor=False, blocksize=512):
+    """Copy the tiled GeoTIFF at path, with its overviews, into the Cloud Optimized GeoTIFF output and
+    delete it; the overviews are reused, not computed again.
+
+    Without the COG driver (GDAL < 3.1), the copy is a tiled GeoTIFF with the overviews copied before the
+    full resolution, the layout of a COG.
+    """
+    driver = gdal.GetDriverByName('COG')
+    if driver is not None:
+        options = ['NUM_THREADS=ALL_CPUS', 'BLOCKSIZE=' + str(blocksize), 'OVERVIEWS=FORCE_USE_EXISTING',
+                   'BIGTIFF=IF_SAFER']
+        if compress:
+            options += ['COMPRESS=' + compress.upper()] + (['PREDICTOR=YES'] if predictor else [])
+    else:
+        driver = gdal.GetDriverByName('GTiff')
+        options = creation_options(True, compress, blocksize, predictor) + ['COPY_SRC_OVERVIEWS=YES',
+                                                                            'BIGTIFF=IF_SAFER']
+    src = gdal.Open(path)
+    ds = driver.CreateCopy(output, src, options=options)
+    ds = src = None  # close files
+    os.remove(path)
+
+
+def window(row0, row1, col0, col1, rows, cols, halo=(0, 0, 0, 0), blocksize=None):
+    """Window (yoff, xoff, ysize, xsize) covering rows row0:row1 and columns col0:col1 plus a (top, bottom,
+    left, right) halo, clipped to the rows x cols raster and extended to whole (xblock, yblock) blocks.
+
+    An axis is only aligned when the blocks are smaller than the raster, so striped files are not read
+    on their full width.
+    """
+    top, bottom, left, right = halo
+    yoff, yend = max(0, row0 - top), min(rows, row1 + bottom)
+    xoff, xend = max(0, col0 - left), min(cols, col1 + right)
+    if blocksize is not None:
+        xblock, yblock = blocksize
+        if yblock < rows:
+            yoff, yend = yoff // yblock * yblock, min(rows, -(-yend // yblock) * yblock)
+        if xblock < cols:
+            xoff, xend = xoff // xblock * xblock, min(cols, -(-xend // xblock) * xblock)
+    return yoff, xoff, yend - yoff, xend - xoff
+
+
+def read_window(band, row0, row1, col0, col1, halo=(0, 0, 0, 0)):
+    """Read rows row0:row1 and columns col0:col1 of the band plus a halo on block-aligned windows.
+
+    Returns the array and the (row, column) of its UL pixel in the band.
+    """
+    yoff, xoff, ysize, xsize = window(row0, row1, col0, col1, band.YSize, band.XSize, halo, band.GetBlockSize())
+    return band.ReadAsArray(xoff, yoff, xsize, ysize), yoff, xoff
@@ -0,0 +1,218 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Memory-budgeted streaming of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import os, re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from .engine import CHUNK, DEFAULT_KERNEL, downscale
+from .provenance import Provenance
+from .raster import BLOCK_SIZE
+from .stats import RunStats
+
+####################################################################################
+# The whole country is downscaled within a memory budget, e.g. on an 8 GB laptop or
+# a small cluster slot, instead of reading both rasters at once. The groups of rows are
+# sized to fit the budget and aligned on the blocks of the rasters, so every GDAL read
+# and write covers whole blocks:
+#   python -m lulcdown.scheduler PRI09_25.tiff AS09_72_25.tiff expert_table_72cat_v4.xls \
+#       LU-CH.tif --memory 8G
+# While a group of rows is downscaled, a reader thread prefetches the BaseMap25 rows and
+# the Landuse100 window of the next one and a writer thread writes the previous ones,
+# so the I/O overlaps the computation (GDAL releases the GIL while reading, decoding,
+# compressing and writing). read and write in the run report are the time the
+# computation waited for them, i.e. the I/O that could not be overlapped.
+# The budget holds, for every row of a group, the BaseMap25 and Landuse100 rows being
+# computed and prefetched, the temporaries of the engine (about 24 bytes per pixel,
+# measured) and the output rows of the buffers being written, plus the neighbours of a
+# chunk of pixels and the GDAL block cache.
+# The array tasks of the parallel version (python -m lulcdown run-tile) and the merge
+# keep to the same budget (run.memory of lulcdown.json): a task holds the windows of
+# its tile and sizes its groups of rows to the rest. The memory to request from SLURM
+# is the budget plus the Python interpreter, numpy and the GDAL libraries (PROCESS).
+####################################################################################
+
+PIXEL_BYTES = 24  # temporaries of the engine per pixel of a group of rows (indices and values of the lookup)
+CHUNK_BYTES = 48  # temporaries of the engine per neighbour of a chunk of case 3 pixels
+QA_BYTES = 9  # decision case, winning score and margin of a pixel (see lulcdown/provenance.py)
+CACHE = 0.125  # share of the budget left to the GDAL block cache, at most CACHE_MAX
+CACHE_MAX = 512 * 1024 ** 2
+WRITES = 2  # groups of rows queued for writing while the next one is computed
+MAX_ROWS = 1024  # larger groups only take more memory and leave less I/O to overlap
+PROCESS = 256 * 1024 ** 2  # Python, numpy and the GDAL libraries, outside of the budget (27 MB without GDAL)
+UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(size):
+    """Number of bytes of a size such as 8G, 512M or 1000000."""
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.match(r'^\s*([0-9.]+)\s*([KMGT]?)i?B?\s*$', str(size), re.IGNORECASE)
+    if match is None:
+        raise ValueError('Invalid memory size %r, e.g. 8G or 512M' % (size,))
+    return int(float(match.group(1)) * UNITS[match.group(2).upper()])
+
+
+def cache_bytes(memory):
+    """Size of the GDAL block cache within a budget of memory bytes."""
+    return min(int(memory * CACHE), CACHE_MAX)
+
+
+def slurm_memory(memory):
+    """--mem of a SLURM job running within the budget memory (bytes or a size such as 768M), e.g. 1024M."""
+    return '%dM' % -(-(parse_size(memory) + PROCESS) // 1024 ** 2)
+
+
+def tile_budget(memory, tile, kernel=None):
+    """Bytes of the budget memory left for the groups of rows of the array task of the tile, once its
+    BaseMap25 window and Landuse100 window with the halo are read and copied to hash its signature;
+    raise a ValueError when the windows do not fit."""
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    top, bottom, left, right = kernel.halo()
+    nrows, ncols = tile['row1'] - tile['row0'], tile['col1'] - tile['col0']
+    windows = 3 * (nrows * ncols + (nrows + top + bottom) * (ncols + left + right))  # read, hashed and its copy
+    if windows >= memory:
+        raise ValueError('A memory budget of %d MB is too small for the windows of tile %d, at least %d MB is needed'
+                         % (memory // 1024 ** 2, tile['id'], -(-windows // 1024 ** 2)))
+    return memory - windows
+
+
+def plan_rows(memory, rows, cols, kernel=None, blocks=((1, 1),), provenance=False, writes=WRITES):
+    """Number of rows of the groups fitting in memory bytes, a multiple of the heights of the (xblock,
+    yblock) blocks of the rasters when it can be; raise a ValueError when not even one row fits."""
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    top, bottom, left, right = kernel.halo()
+    heights = sorted(set(yblock for xblock, yblock in blocks if yblock < rows), reverse=True)
+    buffers = writes + 1  # being computed and being written
+    per_row = cols * (2 * 2 + PIXEL_BYTES + buffers * (1 + (QA_BYTES if provenance else 0)))
+    margin = top + bottom + 2 * (heights[0] if heights else 0)  # halo and block alignment of the Landuse100 windows
+    fixed = (CHUNK * kernel.size ** 2 * CHUNK_BYTES  # neighbours of a chunk
+             + 2 * margin * (cols + left + right)
+             + cache_bytes(memory))  # GDAL block cache
+    block_rows = min((memory - fixed) // per_row, MAX_ROWS)
+    if block_rows < 1:
+        raise ValueError('A memory budget of %d MB is too small for rows of %d pixels, at least %d MB is needed'
+                         % (memory // 1024 ** 2, cols, -(-(fixed + per_row) // 1024 ** 2)))
+    if block_rows >= rows:
+        return rows  # the whole raster at once
+    for align in heights:
+        if block_rows >= align:
+            return int(block_rows // align * align)  # whole blocks of the tallest blocks that fit
+    return int(block_rows)
+
+
+def run(basemap, landuse, expert_table, output, memory, kernel=None, tiled=False, compress=None, every=None,
+        overlay=None, provenance=False, predictor=False, overviews=False, cog=False, writes=WRITES):
+    """Downscale the BaseMap25 raster in groups of rows fitting in memory bytes (or a size such as 8G) and
+    write the output GeoTIFF, reading and writing on background threads while the engine computes.
+
+    The output options, overlay and provenance are the ones of lulcdown.local.run; writes groups of rows
+    are queued for writing at most. The results are identical to the other versions.
+    """
+    from osgeo import gdal  # import GDAL
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .provenance import create_qa
+    from .raster import check_aligned, cog_source, create_output, output_options, to_cog, window, write_rows
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+
+    memory = parse_size(memory)
+    raster = open_raster(basemap)  # open raster, or its prepared raw file
+    LUrast = open_raster(landuse)
+    check_aligned(raster, LUrast)
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+    band, band2 = raster.GetRasterBand(1), LUrast.GetRasterBand(1)
+    tiled, compress, overviews = output_options(tiled, compress, overviews, cog)  # a COG is tiled, compressed
+    blocks = [band.GetBlockSize(), band2.GetBlockSize()] + ([(BLOCK_SIZE, BLOCK_SIZE)] if tiled else [])
+    block_rows = plan_rows(memory, rows, cols, kernel, blocks, provenance, writes)
+    gdal.SetCacheMax(cache_bytes(memory))
+    print('BaseMap25 - Image Size: Rows:'+str(rows)+' Columns:'+str(cols)+', groups of '+str(block_rows)+' rows')
+
+    stats = RunStats(rows, every, name=os.path.basename(output))
+    table = load(expert_table)  # compiled expert table
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+    ds = create_output(cog_source(output) if cog else output, cols, rows, raster.GetGeoTransform(),
+                       raster.GetProjection(), tiled, compress, predictor=predictor, overviews=overviews)
+    ds_qa = None
+    if provenance:
+        ds_qa = create_qa(output, cols, rows, raster.GetGeoTransform(), raster.GetProjection(), tiled, compress)
+    halo = kernel.halo()
+
+    def read(yoff):  # on the reader thread
+        h = min(block_rows, rows - yoff)
+        lu_row0, lu_col0, ysize, xsize = window(yoff, yoff + h, 0, cols, rows, cols, halo, band2.GetBlockSize())
+        return band.ReadAsArray(0, yoff, cols, h), band2.ReadAsArray(lu_col0, lu_row0, xsize, ysize), lu_row0, lu_col0
+
+    def write(yoff, result, qa):  # on the writer thread
+        write_rows(ds.GetRasterBand(1), result, yoff)  # write the assigned values and their overviews
+        if qa is not None:
+            qa.write(ds_qa, yoff)
+        stats.rows_done(result.shape[0])
+
+    # the groups of rows are computed in a ring of buffers, reused once their rows are written
+    buffers = [numpy.empty((block_rows, cols), dtype=numpy.uint8) for b in range(writes + 1)]
+    qas = [Provenance(block_rows, cols) if provenance else None for b in range(writes + 1)]
+    starts = list(range(0, rows, block_rows))
+    with ThreadPoolExecutor(1) as reader, ThreadPoolExecutor(1) as writer:
+        pending = deque()  # writes of the buffers, oldest first
+        prefetch = reader.submit(read, starts[0])
+        for i, yoff in enumerate(starts):
+            with stats.time('read'):
+                data, data2, lu_row0, lu_col0 = prefetch.result()
+            if i + 1 < len(starts):
+                prefetch = reader.submit(read, starts[i + 1])  # read the next group while this one is computed
+            if len(pending) == len(buffers):
+                with stats.time('write'):
+                    pending.popleft().result()  # its buffer is free again
+            h = data.shape[0]
+            out = buffers[i % len(buffers)][:h]
+            qa = None if qas[0] is None else qas[i % len(qas)].block(h)
+            downscale(data, data2, table, yoff, 0, rows, cols, lu_row0, lu_col0, kernel, out=out, stats=stats,
+                      overlay=overlay, qa=qa)
+            data = data2 = None  # released before the next group is read
+            pending.append(writer.submit(write, yoff, out, qa))
+        with stats.time('write'):
+            while pending:
+                pending.popleft().result()
+    with stats.time('write'):
+        ds.FlushCache()  # save file
+        if ds_qa is not None:
+            ds_qa.FlushCache()
+        ds = ds_qa = None  # close files
+        if cog:
+            to_cog(cog_source(output), output, compress, predictor)
+    stats.write(output, memory=memory, block_rows=block_rows)
+
+
+def main():
+    import argparse
+    from . import config as configuration
+    parser = argparse.ArgumentParser(description='Downscale Swiss LCLU data within a memory budget')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('landuse', help='Landuse100 raster on the BaseMap25 grid')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('output', help='output GeoTIFF')
+    parser.add_argument('--memory', default='4G', help='memory budget, e.g. 8G or 512M (default: 4G)')
+    parser.add_argument('--writes', type=int, default=WRITES, help='groups of rows queued for writing (default: 2)')
+    configuration.add_arguments(parser)  # kernel and output options, as the keys of lulcdown.json
+    args = parser.parse_args()
+    run(args.basemap, args.landuse, args.expert_table, args.output, args.memory, writes=args.writes,
+        **configuration.run_options(configuration.from_arguments(args)))
+
+
+if __name__ == '__main__':
+    main()
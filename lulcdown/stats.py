@@ -0,0 +1,173 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Run statistics, progress and run reports of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import json, sys, time
+from contextlib import contextmanager
+
+####################################################################################
+# A RunStats given to the engine sums the time spent in each stage and counts the
+# pixels by decision case:
+#   read      reading BaseMap25 and Landuse100
+#   lookup    Step 5, expert table lookup of the valid pixels
+#   gather    Step 6, gathering of the Landuse100 neighbours of the case 3 pixels
+#   score     Steps 7 to 9, IDW scores and choice of the category
+#   overlay   Step 11, overlay of the linear features
+#   write     writing the output
+# case2 pixels take their unique value; case 3 pixels take the single acceptable
+# neighbour category (case3_single), the default value when no neighbour is acceptable
+# (case3_default) or the highest IDW score (case3_idw); unassigned pixels are valid
+# pixels without any decision in the expert table, left at 0; overlay pixels are the ones
+# changed by Step 11.
+# Every `every` rows the throughput and ETA are printed, and the run report is written
+# as JSON next to the output. Reports of all the tiles are combined by:
+#   python -m lulcdown.stats output/*.report.json
+####################################################################################
+
+STAGES = ('read', 'lookup', 'gather', 'score', 'overlay', 'write')
+COUNTERS = ('pixels', 'valid', 'case2', 'case3_single', 'case3_default', 'case3_idw', 'unassigned', 'overlay')
+
+
+def report_path(path):
+    """Run report of the output raster at path."""
+    return path + '.report.json'
+
+
+def _duration(seconds):
+    seconds = int(seconds)
+    return '%d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+class NoStats(object):
+    """Statistics that are not collected, the default of the engine."""
+
+    @contextmanager
+    def time(self, stage):
+        yield
+
+    def count(self, counter, n):
+        pass
+
+    def rows_done(self, n):
+        pass
+
+
+NO_STATS = NoStats()
+
+
+class RunStats(NoStats):
+    """Time by stage, pixels by decision case and progress of a run over total_rows rows."""
+
+    def __init__(self, total_rows=None, every=None, name=None, stream=sys.stdout):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.total_rows = total_rows
+        self.every = every  # print the progress every `every` rows, never when None
+        self.name = name
+        self.stream = stream
+        self.rows = 0
+        self.start = time.time()
+        self._printed = 0
+
+    @contextmanager
+    def time(self, stage):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.time() - start
+
+    def count(self, counter, n):
+        self.counts[counter] += int(n)
+
+    def rows_done(self, n):
+        """Record that n more rows are written and print the progress when due."""
+        self.rows += n
+        if self.every and (self.rows - self._printed >= self.every or self.rows == self.total_rows):
+            self._printed = self.rows
+            self.stream.write(self.progress() + '\n')
+            self.stream.flush()
+
+    def progress(self):
+        elapsed = time.time() - self.start
+        line = ('' if self.name is None else str(self.name) + ' ') + 'rows ' + str(self.rows)
+        if self.total_rows:
+            line += '/' + str(self.total_rows)
+        line += '  %.2f Mpx/s' % (self.counts['pixels'] / max(elapsed, 1e-9) / 1e6)
+        if self.total_rows and self.rows:
+            line += '  ETA ' + _duration(elapsed * (self.total_rows - self.rows) / self.rows)
+        return line
+
+    def add(self, report):
+        """Add the times and counts of another report, e.g. of a worker process."""
+        for stage, seconds in report['seconds'].items():
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        for counter, n in report['counts'].items():
+            self.counts[counter] = self.counts.get(counter, 0) + n
+
+    def report(self, **extra):
+        """Run report: times by stage, counts, elapsed time and throughput, plus the extra items."""
+        elapsed = time.time() - self.start
+        report = {'name': self.name, 'rows': self.rows, 'elapsed': elapsed, 'seconds': dict(self.seconds),
+                  'counts': dict(self.counts), 'pixels_per_second': self.counts['pixels'] / max(elapsed, 1e-9)}
+        report.update(extra)
+        return report
+
+    def write(self, path, **extra):
+        """Write the run report of the output raster at path."""
+        with open(report_path(path), 'w') as f:
+            json.dump(self.report(**extra), f, indent=1)
+
+
+def summary(reports):
+    """Combine run reports: summed times and counts, wall time of the slowest run."""
+    total = RunStats()
+    for report in reports:
+        total.add(report)
+    elapsed = [r['elapsed'] for r in reports]
+    return {'runs': len(reports), 'seconds': total.seconds, 'counts': total.counts,
+            'elapsed_sum': sum(elapsed), 'elapsed_max': max(elapsed) if elapsed else 0.0,
+            'pixels_per_second': total.counts['pixels'] / max(sum(elapsed), 1e-9),
+            'slowest': sorted(reports, key=lambda r: -r['elapsed'])[:5]}
+
+
+def main():
+    import argparse, glob, os
+    parser = argparse.ArgumentParser(description='Combine the run reports of the tiles of a downscaling')
+    parser.add_argument('reports', nargs='+', help='run reports (*.report.json) or directories holding them')
+    parser.add_argument('--json', default=None, help='write the summary to this JSON file')
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.reports:
+        paths += sorted(glob.glob(os.path.join(path, '*.report.json'))) if os.path.isdir(path) else [path]
+    reports = []
+    for path in paths:
+        with open(path) as f:
+            reports.append(json.load(f))
+    s = summary(reports)
+
+    print('Runs: ' + str(s['runs']) + '  total ' + _duration(s['elapsed_sum']) + '  slowest ' + _duration(s['elapsed_max']))
+    print('Throughput: %.2f Mpx/s per run' % (s['pixels_per_second'] / 1e6))
+    busy = sum(s['seconds'].values())
+    for stage in STAGES:
+        print('  %-8s %12.1f s %6.1f %%' % (stage, s['seconds'].get(stage, 0.0),
+                                           100.0 * s['seconds'].get(stage, 0.0) / max(busy, 1e-9)))
+    for counter in COUNTERS:
+        print('  %-14s %14d' % (counter, s['counts'].get(counter, 0)))
+    print('Slowest runs:')
+    for r in s['slowest']:
+        print('  %-12s %s' % (r['name'], _duration(r['elapsed'])))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(s, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Calibration sweep of the IDW parameters of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import itertools, json, os
+
+from .engine import BLOCK_ROWS, NODATA, downscale_sweep
+from .kernel import DISTANCES, LISSAGE, RANGE_XY, SIZE, Kernel
+from .stats import RunStats
+
+####################################################################################
+# rangeXY, lissage, the distance and the size of the neighbours window are calibrated
+# in a single pass over the grid instead of one national run per setting: every group
+# of rows is read once, the expert table lookup is done once and the neighbours are
+# gathered once per window size, then the IDW of all the settings are summed together
+# (lulcdown.engine.downscale_sweep). Each setting is compared with a reference map on
+# the same grid and/or written as its own output, e.g.:
+#   python -m lulcdown.sweep PRI09_25.tiff AS09_72_25.tiff expert_table_72cat_v4.xls \
+#       --range 13 18.38 24 --lissage 0.01 0.1 1 --distance euclidean manhattan \
+#       --reference LU-CH-validated.tif --json sweep.json
+# The agreement is counted on the valid BaseMap25 pixels where the reference has a value.
+####################################################################################
+
+
+def setting_name(kernel):
+    """Name of the setting of a kernel, used for its output, e.g. r18.38_l0.1_euclidean_s6."""
+    return 'r%g_l%g_%s_s%d' % (kernel.rangeXY, kernel.lissage, kernel.distance_function, kernel.size)
+
+
+def grid(ranges=(RANGE_XY,), lissages=(LISSAGE,), distances=('euclidean',), sizes=(SIZE,)):
+    """Kernels of every combination of the parameters."""
+    return [Kernel(rangeXY, lissage, size, distance=distance)
+            for rangeXY, lissage, distance, size in itertools.product(ranges, lissages, distances, sizes)]
+
+
+def run(basemap, landuse, expert_table, kernels, reference=None, output_dir=None, block_rows=BLOCK_ROWS, every=None,
+        tiled=False, compress=None):
+    """Downscale the BaseMap25 raster with every kernel in one pass and return the results by setting.
+
+    Each result counts the pixels compared with the reference raster and the ones that agree, and the
+    pixels that differ from the first setting. The outputs are written in output_dir when it is given.
+    """
+    from .expert_table import load
+    from .prepare import open_raster
+    from .raster import check_aligned, create_output, window, write_rows
+
+    raster = open_raster(basemap)  # open raster, or its prepared raw file
+    LUrast = open_raster(landuse)
+    check_aligned(raster, LUrast)
+    ref = None
+    if reference is not None:
+        ref = open_raster(reference)
+        check_aligned(raster, ref)  # the reference map is read with the same indices
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+    print('BaseMap25 - Image Size: Rows:'+str(rows)+' Columns:'+str(cols)+', '+str(len(kernels))+' settings')
+
+    names = [setting_name(kernel) for kernel in kernels]
+    stats = RunStats(rows, every, name='sweep')
+    table = load(expert_table)  # compiled expert table
+    outputs = []
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = [create_output(os.path.join(output_dir, 'LU_' + name + '.tif'), cols, rows,
+                                 raster.GetGeoTransform(), raster.GetProjection(), tiled, compress) for name in names]
+    halo = tuple(max(h) for h in zip(*[kernel.halo() for kernel in kernels]))  # neighbours of every window
+    results = {name: {'compared': 0, 'agree': 0, 'differs_from_first': 0} for name in names}
+    for yoff in range(0, rows, block_rows):
+        h = min(block_rows, rows - yoff)
+        lu_row0, lu_col0, ysize, xsize = window(yoff, yoff + h, 0, cols, rows, cols, halo)  # rows and neighbours
+        with stats.time('read'):
+            data = raster.GetRasterBand(1).ReadAsArray(0, yoff, cols, h)
+            data2 = LUrast.GetRasterBand(1).ReadAsArray(lu_col0, lu_row0, xsize, ysize)
+            expected = None if ref is None else ref.GetRasterBand(1).ReadAsArray(0, yoff, cols, h)
+        outs = downscale_sweep(data, data2, table, kernels, yoff, 0, rows, cols, lu_row0, lu_col0, stats=stats)
+
+        valid = (data > 0) & (data < NODATA)
+        compared = valid if expected is None else valid & (expected < NODATA)
+        for name, out in zip(names, outs):
+            result = results[name]
+            result['differs_from_first'] += int((out[valid] != outs[0][valid]).sum())
+            if expected is not None:
+                result['compared'] += int(compared.sum())
+                result['agree'] += int((out[compared] == expected[compared]).sum())
+        with stats.time('write'):
+            for ds, out in zip(outputs, outs):
+                write_rows(ds.GetRasterBand(1), out, yoff)  # write the assigned values
+        stats.rows_done(h)
+    with stats.time('write'):
+        for ds in outputs:
+            ds.FlushCache()  # save file
+    outputs = None  # close files
+
+    for name, kernel in zip(names, kernels):
+        result = results[name]
+        result.update(rangeXY=kernel.rangeXY, lissage=kernel.lissage, distance=kernel.distance_function,
+                      size=kernel.size)
+        if reference is not None:
+            result['agreement'] = result['agree'] / float(max(result['compared'], 1))
+    return {'settings': results, 'reference': reference, 'run': stats.report()}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Calibrate the IDW parameters of the downscaling in one pass')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('landuse', help='Landuse100 raster on the BaseMap25 grid')
+    parser.add_argument('expert_table', help='expert table (.xls)')
+    parser.add_argument('--range', type=float, nargs='+', default=[RANGE_XY], help='values of rangeXY')
+    parser.add_argument('--lissage', type=float, nargs='+', default=[LISSAGE], help='values of lissage')
+    parser.add_argument('--distance', nargs='+', default=['euclidean'], choices=DISTANCES, help='distance functions')
+    parser.add_argument('--size', type=int, nargs='+', default=[SIZE], help='sizes of the neighbours window')
+    parser.add_argument('--reference', default=None, help='reference map on the BaseMap25 grid to compare with')
+    parser.add_argument('--outputs', default=None, metavar='DIR', help='write the output of every setting in DIR')
+    parser.add_argument('--json', default=None, help='write the results to this JSON file')
+    parser.add_argument('--progress', type=int, default=None, metavar='N', help='print throughput and ETA every N rows')
+    args = parser.parse_args()
+
+    kernels = grid(args.range, args.lissage, args.distance, args.size)
+    sweep = run(args.basemap, args.landuse, args.expert_table, kernels, args.reference, args.outputs,
+                every=args.progress)
+    settings = sweep['settings']
+    order = sorted(settings, key=lambda name: -settings[name].get('agreement', 0.0))
+    for name in order:
+        result = settings[name]
+        line = '%-32s differs from first %12d' % (name, result['differs_from_first'])
+        if 'agreement' in result:
+            line += '  agreement %.4f' % result['agreement']
+        print(line)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(sweep, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Load-balanced tiling of the downscaling of Swiss LCLU data
+##########################################################
+
+# import libraries
+import json
+
+import numpy
+
+from .raster import bounds
+
+####################################################################################
+# The work of a tile is its number of valid BaseMap25 pixels (1..254): tiles outside
+# Switzerland are almost empty while tiles on the Plateau are full. The valid pixels
+# are counted on a grid of cells, which is then split recursively into rectangles
+# holding about the same number of valid pixels, one per array task.
+# The manifest also holds the georeferencing of the raster and the extent of every
+# tile, so it is the index of the tiles, which are each georeferenced at their position.
+####################################################################################
+
+CELL = 32  # size of the cells on which the valid pixels are counted, tiles are made of whole cells
+MANIFEST = 'tiles.json'  # default tile manifest
+TILE_NAME = 'output_{id}.tif'  # output of each tile, inside the output directory
+
+
+def count_valid(band, cell=CELL):
+    """Number of valid BaseMap25 pixels in each cell x cell block, read by strips of cell rows."""
+    rows, cols = band.YSize, band.XSize
+    gy, gx = -(-rows // cell), -(-cols // cell)
+    counts = numpy.zeros((gy, gx), dtype=numpy.int64)
+    for j in range(gy):
+        h = min(cell, rows - j * cell)
+        data = band.ReadAsArray(0, j * cell, cols, h)
+        valid = numpy.zeros((h, gx * cell), dtype=numpy.int64)
+        valid[:, :cols] = (data > 0) & (data < 255)
+        counts[j] = valid.reshape(h, gx, cell).sum(axis=(0, 2))
+    return counts
+
+
+def _split(counts, r0, r1, c0, c1, ntasks, tiles):
+    """Split the cells r0:r1, c0:c1 into ntasks rectangles of about equal counts."""
+    sub = counts[r0:r1, c0:c1]
+    if ntasks == 1 or sub.sum() == 0 or (r1 - r0 == 1 and c1 - c0 == 1):
+        tiles.append((r0, r1, c0, c1))
+        return
+    n1 = ntasks // 2
+    target = sub.sum() * n1 / ntasks  # work of the first part
+    best = None
+    for axis, n in ((0, r1 - r0), (1, c1 - c0)):
+        if n < 2:
+            continue
+        cumul = numpy.cumsum(sub.sum(axis=1 - axis))[:-1]  # work before each possible split
+        s = int(numpy.argmin(numpy.abs(cumul - target)))
+        key = (abs(cumul[s] - target), -n)  # most balanced split, along the longest side on equality
+        if best is None or key < best[0]:
+            best = (key, axis, s + 1)
+    key, axis, s = best
+    if axis == 0:
+        _split(counts, r0, r0 + s, c0, c1, n1, tiles)
+        _split(counts, r0 + s, r1, c0, c1, ntasks - n1, tiles)
+    else:
+        _split(counts, r0, r1, c0, c0 + s, n1, tiles)
+        _split(counts, r0, r1, c0 + s, c1, ntasks - n1, tiles)
+
+
+def _manifest(cells, counts, rows, cols, cell, geotransform, projection):
+    tiles = []
+    for i, (r0, r1, c0, c1) in enumerate(cells):
+        tile = {'id': i, 'row0': r0 * cell, 'row1': min(rows, r1 * cell), 'col0': c0 * cell,
+                'col1': min(cols, c1 * cell), 'valid': int(counts[r0:r1, c0:c1].sum())}
+        tile['bounds'] = bounds(geotransform, tile['row0'], tile['row1'], tile['col0'], tile['col1'])  # minx, miny, maxx, maxy
+        tiles.append(tile)
+    return {'rows': rows, 'cols': cols, 'cell': cell, 'geotransform': list(geotransform), 'projection': projection,
+            'tiles': tiles}
+
+
+def plan(counts, ntasks, rows, cols, cell=CELL, geotransform=(0, 1, 0, 0, 0, -1), projection=''):
+    """Manifest of at most ntasks tiles with about the same number of valid pixels."""
+    cells = []
+    _split(counts, 0, counts.shape[0], 0, counts.shape[1], ntasks, cells)
+    return _manifest(cells, counts, rows, cols, cell, geotransform, projection)
+
+
+def regular(counts, nR, nC, rows, cols, cell=CELL, geotransform=(0, 1, 0, 0, 0, -1), projection=''):
+    """Manifest of the nR x nC grid of equal rectangles (snapped to the cells)."""
+    gy, gx = counts.shape
+    ry = [int(round(r * gy / nR)) for r in range(nR + 1)]
+    rx = [int(round(c * gx / nC)) for c in range(nC + 1)]
+    cells = [(ry[r], ry[r + 1], rx[c], rx[c + 1]) for r in range(nR) for c in range(nC)
+             if ry[r] < ry[r + 1] and rx[c] < rx[c + 1]]
+    return _manifest(cells, counts, rows, cols, cell, geotransform, projection)
+
+
+def imbalance(manifest):
+    """Largest work of a tile divided by the mean work, 1 being a perfect balance."""
+    work = numpy.array([t['valid'] for t in manifest['tiles']], dtype=float)
+    return work.max() / work.mean() if work.sum() > 0 else 1.0
+
+
+def write_manifest(path, manifest):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def read_manifest(path=MANIFEST):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    import argparse
+    from .prepare import open_raster
+    parser = argparse.ArgumentParser(description='Plan the tiles of the HPC downscaling with equal work per task')
+    parser.add_argument('basemap', help='BaseMap25 raster')
+    parser.add_argument('manifest', nargs='?', default=MANIFEST, help='tile manifest to write (default: tiles.json)')
+    parser.add_argument('--tasks', type=int, default=900, help='number of array tasks (default: 900)')
+    parser.add_argument('--cell', type=int, default=CELL, help='size of the counting cells in pixels (default: 32)')
+    parser.add_argument('--regular', default=None, metavar='RxC', help='equal grid of R x C tiles instead, e.g. 30x30')
+    args = parser.parse_args()
+
+    raster = open_raster(args.basemap)  # open raster, or its prepared raw file
+    rows, cols = raster.RasterYSize, raster.RasterXSize
+    counts = count_valid(raster.GetRasterBand(1), args.cell)
+    nR, nC = 30, 30
+    if args.regular:
+        nR, nC = [int(n) for n in args.regular.lower().split('x')]
+    georef = (raster.GetGeoTransform(), raster.GetProjection())
+    grid = regular(counts, nR, nC, rows, cols, args.cell, *georef)
+    manifest = grid if args.regular else plan(counts, args.tasks, rows, cols, args.cell, *georef)
+    manifest['raster'] = args.basemap
+    write_manifest(args.manifest, manifest)
+
+    print('Valid pixels: ' + str(int(counts.sum())))
+    print('Regular ' + str(nR) + 'x' + str(nC) + ' grid imbalance (max/mean): %.2f' % imbalance(grid))
+    print('Planned tiles: ' + str(len(manifest['tiles'])) + ', imbalance (max/mean): %.2f' % imbalance(manifest))
+    print('Submit with: sbatch --array=0-' + str(len(manifest['tiles']) - 1) + ' run_main_HPC.sh')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Incremental update of the downscaled Swiss LCLU data after a change of the inputs
+##########################################################
+
+# import libraries
+import os
+
+import numpy
+
+from .engine import BLOCK_ROWS, DEFAULT_KERNEL, downscale
+from .stats import RunStats
+
+####################################################################################
+# An output pixel only depends on its BaseMap25 value and on its 6x6 Landuse100
+# neighbours, so after an update of BaseMap25 (TLM3D) or a correction of Landuse100
+# only the pixels whose value changed or which have a changed Landuse100 pixel among
+# their neighbours can change. The old and new inputs are compared by groups of rows,
+# the changed Landuse100 pixels are spread back to the pixels reading them (the exact
+# reverse of the neighbours window) and only those pixels are computed again and
+# patched into the existing output, e.g. LU-CH.tif:
+#   python -m lulcdown.update PRI09_25.tiff PRI09_25_v2.tiff AS09_72_25.tiff AS09_72_25_v2.tiff \
+#       expert_table_72cat_v4.xls LU-CH.tif
+# The output must have been computed from the old inputs with the same expert table
+# and IDW parameters; the result is then identical to a full run on the new inputs.
+####################################################################################
+
+
+def reached(changed, row0, col0, nrows, ncols, rows, cols, lu_row0, lu_col0, kernel=None):
+    """Pixels of the nrows x ncols block at (row0, col0) having a changed Landuse100 pixel among their
+    neighbours; changed is the mask of changed pixels of the Landuse100 window at (lu_row0, lu_col0)."""
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+    result = numpy.zeros((nrows, ncols), dtype=bool)
+    if not changed.any():
+        return result
+    ny, nx = kernel.lines(numpy.arange(row0, row0 + nrows), numpy.arange(col0, col0 + ncols))
+    inside_y = (ny >= 0) & (ny < rows)  # neighbours outside the raster are not read
+    inside_x = (nx >= 0) & (nx < cols)
+    iy = numpy.clip(ny - lu_row0, 0, changed.shape[0] - 1)
+    ix = numpy.clip(nx - lu_col0, 0, changed.shape[1] - 1)
+    for a in range(ny.shape[1]):
+        lines = changed[iy[:, a]] & inside_y[:, a, None]  # changed pixels of the a-th neighbour row of each row
+        if not lines.any():
+            continue
+        for b in range(nx.shape[1]):
+            result |= lines[:, ix[:, b]] & inside_x[None, :, b]
+    return result
+
+
+def update(old_basemap, new_basemap, old_landuse, new_landuse, expert_table, output, kernel=None,
+           block_rows=BLOCK_ROWS, dry_run=False, every=None, overlay=None):
+    """Patch the output computed from the old inputs so that it matches the new inputs.
+
+    overlay is the Step 11 CSV file of rules the output was computed with (none by default).
+
+    Returns the run report, which counts the changed input pixels, the affected pixels and the output
+    pixels that changed. Nothing is written when dry_run is True.
+    """
+    from osgeo import gdal  # import GDAL
+    from .expert_table import load
+    from .overlay import Overlay
+    from .prepare import open_raster
+    from .raster import check_aligned, window, write_rows
+    if kernel is None:
+        kernel = DEFAULT_KERNEL
+
+    rasters = [open_raster(path) for path in (old_basemap, new_basemap, old_landuse, new_landuse)]
+    for ds in rasters[1:]:
+        check_aligned(rasters[0], ds)  # same grid for the old and new inputs
+    band_old, band_new, band2_old, band2_new = [ds.GetRasterBand(1) for ds in rasters]
+    rows, cols = rasters[0].RasterYSize, rasters[0].RasterXSize
+    ds = gdal.Open(output, gdal.GA_ReadOnly if dry_run else gdal.GA_Update)  # patched in place
+    if (ds.RasterYSize, ds.RasterXSize) != (rows, cols):
+        raise ValueError(output + ' is not on the grid of the inputs')
+    out = ds.GetRasterBand(1)
+
+    table = load(expert_table)  # compiled expert table
+    if overlay is not None:
+        overlay = Overlay.from_csv(overlay)  # Step 11 rules
+    stats = RunStats(rows, every, name=os.path.basename(output))
+    changes = dict.fromkeys(('basemap_changed', 'landuse_changed', 'affected', 'output_changed'), 0)
+    halo = kernel.halo()
+    for yoff in range(0, rows, block_rows):
+        h = min(block_rows, rows - yoff)
+        lu_row0, lu_col0, ysize, xsize = window(yoff, yoff + h, 0, cols, rows, cols, halo)  # rows and neighbours
+        with stats.time('read'):
+            data_old, data = band_old.ReadAsArray(0, yoff, cols, h), band_new.ReadAsArray(0, yoff, cols, h)
+            data2_old = band2_old.ReadAsArray(lu_col0, lu_row0, xsize, ysize)
+            data2 = band2_new.ReadAsArray(lu_col0, lu_row0, xsize, ysize)
+        with stats.time('lookup'):
+            changed = data != data_old
+            changed2 = data2 != data2_old
+            changes['basemap_changed'] += int(changed.sum())
+            changes['landuse_changed'] += int(changed2[yoff - lu_row0:yoff - lu_row0 + h].sum())  # rows of the block
+            affected = changed | reached(changed2, yoff, 0, h, cols, rows, cols, lu_row0, lu_col0, kernel)
+        if not affected.any():
+            stats.rows_done(h)
+            continue
+        changes['affected'] += int(affected.sum())
+
+        # the pixels that are not affected are set to 0 (country mask) so that only the affected ones are computed
+        result = downscale(numpy.where(affected, data, 0), data2, table, yoff, 0, rows, cols, lu_row0, lu_col0,
+                           kernel, stats=stats, overlay=overlay)
+        with stats.time('read'):
+            current = out.ReadAsArray(0, yoff, cols, h)
+        patch = affected & (result != current)
+        changes['output_changed'] += int(patch.sum())
+        if patch.any() and not dry_run:
+            current[patch] = result[patch]
+            with stats.time('write'):
+                write_rows(out, current, yoff)  # write the patched rows and their overviews
+        stats.rows_done(h)
+    if not dry_run:
+        with stats.time('write'):
+            ds.FlushCache()  # save file
+    ds = None  # close file
+    report = stats.report(update=changes, dry_run=dry_run)
+    if not dry_run:
+        stats.write(output + '.update', update=changes)  # LU-CH.tif.update.report.json
+    return report
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Recompute only the pixels affected by a change of the inputs and '
+                                                 'patch the output in place')
+    parser.add_argument('old_basemap', help='BaseMap25 raster the output was computed from')
+    parser.add_argument('new_basemap', help='updated BaseMap25 raster')
+    parser.add_argument('old_landuse', help='Landuse100 raster the output was computed from')
+    parser.add_argument('new_landuse', help='updated Landuse100 raster')
+    parser.add_argument('expert_table', help='expert table (.xls) the output was computed with')
+    parser.add_argument('output', help='output GeoTIFF to patch, e.g. LU-CH.tif')
+    parser.add_argument('--dry-run', action='store_true', help='only count the affected pixels, write nothing')
+    parser.add_argument('--progress', type=int, default=None, metavar='N', help='print throughput and ETA every N rows')
+    parser.add_argument('--overlay', default=None, metavar='CSV', help='Step 11 rules the output was computed with')
+    args = parser.parse_args()
+    report = update(args.old_basemap, args.new_basemap, args.old_landuse, args.new_landuse, args.expert_table,
+                    args.output, dry_run=args.dry_run, every=args.progress, overlay=args.overlay)
+    changes = report['update']
+    print('Changed BaseMap25 pixels: ' + str(changes['basemap_changed']))
+    print('Changed Landuse100 pixels: ' + str(changes['landuse_changed']))
+    print('Affected pixels computed again: ' + str(changes['affected']))
+    print('Output pixels ' + ('to change: ' if args.dry_run else 'changed: ') + str(changes['output_changed']))
+
+
+if __name__ == '__main__':
+    main()
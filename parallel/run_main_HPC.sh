@@ -2,12 +2,31 @@
 
 #SBATCH --partition=shared-cpu,private-lehmann-cpu
 #SBATCH --time=08:00:00
-#SBATCH --mem=60G
+#SBATCH --mem=1G
+
+#--mem is the memory budget of each task (run.memory of lulcdown.json, e.g. "768M") plus 256M for Python, numpy
+#and the GDAL libraries, as printed by plan: 1G for run.memory=768M. The task keeps the windows of its tile, its
+#groups of rows and the GDAL block cache within the budget; the largest of the 900 tiles of the national raster
+#peaked at 77 MB (python benchmarks/run.py --sizes national --stages tiles,task --tasks 900 --memory 768M)
 
 #load modules
 
 module load GCC/8.2.0-2.31.1 OpenMPI/3.1.3 Python/3.7.2 SciPy-bundle/2019.03 GDAL/3.0.0-Python-3.7.2 xarray/0.13.0-Python-3.7.2
 
-#launch execution
+#the inputs, tiling, block size and scratch directory are read from lulcdown.json, written with the defaults by:
+#  PYTHONPATH=.. python3 -m lulcdown config lulcdown.json
+#plan the tiles once before submitting, it prints the number of tiles and the predicted imbalance:
+#  PYTHONPATH=.. python3 -m lulcdown plan
+#check and compile the expert table once, the tasks load expert_table_72cat_v4.npz instead of parsing the spreadsheet:
+#  PYTHONPATH=.. python3 -m lulcdown.expert_table expert_table_72cat_v4.xls
+#then submit one array task per tile:
+#  sbatch --array=0-<number of tiles - 1> run_main_HPC.sh
+#tiles already complete are skipped and preempted tiles resume; to resubmit only the tiles that are missing,
+#incomplete or computed from other inputs:
+#  PYTHONPATH=.. python3 -m lulcdown status --submit run_main_HPC.sh
+
+#launch execution, the same as: PYTHONPATH=.. srun python3 -m lulcdown run-tile
+#e.g. with the node-local disk as scratch: srun python3 main_HPC.py --set run.scratch='$TMPDIR'
+#(the partial tiles are then wiped with the job, a preempted tile restarts from its first row instead of resuming)
 srun python3 main_HPC.py
 
@@ -2,7 +2,11 @@
 
 #SBATCH --partition=shared-cpu,private-lehmann-cpu
 #SBATCH --time=10:00:00
-#SBATCH --mem=62G
+#SBATCH --mem=1G
+
+#--mem is run.memory of lulcdown.json (e.g. "768M", which bounds the GDAL block cache) plus 256M for Python, numpy
+#and the GDAL libraries; the merge itself holds one strip of rows, the national mosaic of 900 tiles peaked at
+#41 MB (python benchmarks/run.py --sizes national --stages tiles,merge --tasks 900 --memory 768M)
 
 #load modules
 
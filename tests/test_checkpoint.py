@@ -0,0 +1,125 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Checkpoint, resume and signatures of the HPC tiles
+##########################################################
+
+# import libraries
+import os, shutil, sys
+
+import numpy
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+
+gdal = pytest.importorskip('osgeo.gdal')
+pytest.importorskip('xlrd')
+
+from lulcdown import hpc
+from lulcdown.checkpoint import COMPLETE, halo_window, marker_path, progress_path, signature, status, tile_inputs
+from lulcdown.expert_table import load
+from lulcdown.kernel import Kernel
+from lulcdown.tiling import read_manifest, regular, write_manifest
+
+EXPERT_TABLE = os.path.join(HERE, '..', 'expert_table_72cat_v4.xls')
+ROWS, COLS = 300, 400
+
+
+class Preempted(Exception):
+    pass
+
+
+def _write(path, data, options=()):
+    ds = gdal.GetDriverByName('GTiff').Create(path, COLS, ROWS, 1, gdal.GDT_Byte, list(options))
+    ds.SetGeoTransform((2485000.0, 25.0, 0, 1296000.0, 0, -25.0))
+    ds.GetRasterBand(1).WriteArray(data)
+    ds.FlushCache()
+    ds = None
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    rs = numpy.random.RandomState(3)
+    data = rs.choice(numpy.r_[0, 255, numpy.arange(1, 30)], size=(ROWS, COLS)).astype(numpy.uint8)
+    codes = numpy.r_[255, 42, 50, 14, 64, 56, 28, 23, 27, 29, 12, 32, 51]
+    data2 = numpy.kron(rs.choice(codes, size=(ROWS // 4, COLS // 4)), numpy.ones((4, 4))).astype(numpy.uint8)
+    paths = {name: str(tmp_path / name) for name in ('basemap.tif', 'landuse.tif', 'tiled.tif', 'tiles.json')}
+    _write(paths['basemap.tif'], data)
+    _write(paths['landuse.tif'], data2)  # striped
+    _write(paths['tiled.tif'], data2, ['TILED=YES', 'BLOCKXSIZE=64', 'BLOCKYSIZE=64', 'COMPRESS=DEFLATE'])
+    paths['expert_table'] = str(tmp_path / 'expert_table.xls')
+    shutil.copy(EXPERT_TABLE, paths['expert_table'])  # compiled next to it
+    counts = numpy.ones((-(-ROWS // 32), -(-COLS // 32)), dtype=numpy.int64)
+    write_manifest(paths['tiles.json'], regular(counts, 2, 2, ROWS, COLS))
+    paths['tiles'] = str(tmp_path / 'output')
+    return paths
+
+
+def test_signature_ignores_the_blocks_of_the_inputs(inputs):
+    kernel = Kernel()
+    band = gdal.Open(inputs['basemap.tif']).GetRasterBand(1)
+    table_hash = load(inputs['expert_table']).xls_hash
+    for tile in read_manifest(inputs['tiles.json'])['tiles']:
+        signs = []
+        for name in ('landuse.tif', 'tiled.tif'):
+            data, data2, lu_row0, lu_col0 = tile_inputs(band, gdal.Open(inputs[name]).GetRasterBand(1), tile, kernel)
+            signs.append(signature(data, halo_window(data2, lu_row0, lu_col0, tile, kernel, ROWS, COLS), table_hash,
+                                   kernel))
+        assert signs[0] == signs[1]
+
+
+def _run(inputs, task, kernel=None):
+    return hpc.run_tile(task, inputs['basemap.tif'], inputs['landuse.tif'], inputs['expert_table'],
+                        inputs['tiles.json'], inputs['tiles'], kernel, block_rows=16)
+
+
+def test_partial_tile_resumes_and_stale_marker_is_removed(inputs, monkeypatch):
+    task = 3
+    final = os.path.join(inputs['tiles'], 'output_%d.tif' % task)
+    assert _run(inputs, task)
+    expected = gdal.Open(final).GetRasterBand(1).ReadAsArray()
+    shutil.rmtree(inputs['tiles'])
+
+    downscale_rows = hpc.downscale_rows
+    calls = []
+
+    def preempted(data, *args, **kwargs):  # the task is killed after its first group of rows
+        for i, group in enumerate(downscale_rows(data, *args, **kwargs)):
+            if i == 1:
+                raise Preempted()
+            yield group
+
+    monkeypatch.setattr(hpc, 'downscale_rows', preempted)
+    with pytest.raises(Preempted):
+        _run(inputs, task)
+    assert os.path.exists(progress_path(final)) and not os.path.exists(marker_path(final))
+
+    def resumed(data, *args, **kwargs):
+        calls.append(data.shape[0])
+        return downscale_rows(data, *args, **kwargs)
+
+    monkeypatch.setattr(hpc, 'downscale_rows', resumed)
+    assert _run(inputs, task)
+    tile = read_manifest(inputs['tiles.json'])['tiles'][task]
+    assert calls == [tile['row1'] - tile['row0'] - 16]  # only the rows after the first group
+    numpy.testing.assert_array_equal(gdal.Open(final).GetRasterBand(1).ReadAsArray(), expected)
+    assert os.path.exists(marker_path(final)) and not os.path.exists(progress_path(final))
+    assert not _run(inputs, task)  # complete, skipped
+
+    def stale(data, *args, **kwargs):  # computed with another kernel: the old marker is gone before any row
+        calls.append(os.path.exists(marker_path(final)))
+        return downscale_rows(data, *args, **kwargs)
+
+    monkeypatch.setattr(hpc, 'downscale_rows', stale)
+    kernel = Kernel(lissage=0.2)
+    assert _run(inputs, task, kernel)
+    assert calls[-1] is False
+    data, data2, lu_row0, lu_col0 = tile_inputs(gdal.Open(inputs['basemap.tif']).GetRasterBand(1),
+                                                gdal.Open(inputs['landuse.tif']).GetRasterBand(1), tile, kernel)
+    sign = signature(data, halo_window(data2, lu_row0, lu_col0, tile, kernel, ROWS, COLS),
+                     load(inputs['expert_table']).xls_hash, kernel)
+    assert status(final, sign) == COMPLETE
@@ -0,0 +1,101 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# The vectorized engine against the per-pixel algorithm of version 1.4.5
+##########################################################
+
+# import libraries
+import os, sys
+
+import numpy
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
+
+xlrd = pytest.importorskip('xlrd')
+
+from lulcdown.engine import downscale, downscale_epochs, downscale_sweep
+from lulcdown.expert_table import ExpertTable
+from lulcdown.kernel import Kernel
+from lulcdown.provenance import CASE_IDW, Provenance
+from reference import reference
+
+EXPERT_TABLE = os.path.join(HERE, '..', 'expert_table_72cat_v4.xls')
+
+####################################################################################
+# Landuse100 is a checkerboard of two acceptable categories of a case 3 BaseMap25
+# value, so many pixels have neighbours of both categories at mirrored distances and
+# their IDW sums are exactly equal: the last candidate of the expert table must win,
+# as in the per-pixel loop. Every position inside the Landuse100 cells is visited,
+# including the rows and columns 2 mod 4 where round() rounds half to even.
+####################################################################################
+
+
+def _inputs(table, rows=44, cols=52):
+    weights = table.weights
+    value = next(v for v in range(1, 255) if (weights[v] == 1).sum() >= 2 and (weights[v] == 3).any()
+                 and not (weights[v] == 2).any())  # case 3 value
+    unique = next(v for v in range(1, 255) if (weights[v] == 2).any())  # case 2 value
+    code1, code2 = numpy.flatnonzero(weights[value] == 1)[:2]
+    data = numpy.full((rows, cols), value, dtype=numpy.uint8)
+    data[5, :] = unique
+    data[:, 7] = unique
+    data[0, :3] = 0  # country mask
+    data[-1, -3:] = 255  # no data
+    cells = (numpy.add.outer(numpy.arange(rows) // 4, numpy.arange(cols) // 4) % 2).astype(bool)
+    data2 = numpy.where(cells, code1, code2).astype(numpy.uint8)
+    data2[-8:, -8:] = 255  # no neighbour inside Switzerland, the default (3) value
+    return data, data2
+
+
+def test_downscale_matches_reference():
+    sheet = xlrd.open_workbook(EXPERT_TABLE).sheet_by_index(0)
+    table = ExpertTable.from_sheet(sheet)
+    data, data2 = _inputs(table)
+    qa = Provenance(*data.shape)
+    result = downscale(data, data2, table, qa=qa)
+    tied = (qa.case == CASE_IDW) & (qa.margin == 0)
+    assert tied.sum() > 0  # the tie-breaking rule is exercised
+    expected = reference(data, data2, sheet, 0, data.shape[0], 0, data.shape[1])
+    numpy.testing.assert_array_equal(result, expected)
+
+
+def _random_inputs(seed, rows=120, cols=140):
+    rs = numpy.random.RandomState(seed)
+    data = rs.choice(numpy.r_[0, 255, numpy.arange(1, 30)], size=(rows, cols)).astype(numpy.uint8)
+    codes = numpy.r_[255, 42, 50, 14, 64, 56, 28, 23, 27, 29, 12, 32, 51]
+    data2 = numpy.kron(rs.choice(codes, size=(rows // 4, cols // 4)), numpy.ones((4, 4))).astype(numpy.uint8)
+    return data, data2
+
+
+def test_sweep_matches_separate_runs():
+    table = ExpertTable.from_xls(EXPERT_TABLE)
+    data, data2 = _random_inputs(5)
+    kernels = [Kernel(13, 0.1), Kernel(18.38, 1), Kernel(24, 0.01), Kernel(18.38, 0.1, distance='manhattan'),
+               Kernel(18.38, 0.1, size=8)]
+    for row0, row1 in ((0, 120), (37, 90)):  # the whole raster and a block inside it
+        block = data[row0:row1]
+        outs = downscale_sweep(block, data2, table, kernels, row0, 0, chunk=97)
+        for kernel, out in zip(kernels, outs):
+            numpy.testing.assert_array_equal(out, downscale(block, data2, table, row0, 0, kernel=kernel))
+
+
+def test_epochs_match_separate_runs():
+    table = ExpertTable.from_xls(EXPERT_TABLE)
+    data, data2 = _random_inputs(6)
+    later, later2 = _random_inputs(7)
+    masked2 = data2.copy()
+    masked2[40:80, 20:100] = 255  # a year whose Landuse100 has another no data mask
+    data2s = [data2, masked2, later2]  # the first two years share the BaseMap25 block and its lookup
+    for row0, row1 in ((0, 120), (37, 90)):
+        block = data[row0:row1]
+        blocks = [block, block, later[row0:row1]]
+        outs = downscale_epochs(blocks, data2s, table, row0, 0, chunk=97)
+        for block_e, data2_e, out in zip(blocks, data2s, outs):
+            numpy.testing.assert_array_equal(out, downscale(block_e, data2_e, table, row0, 0))
+    assert (outs[0] != outs[1]).any()  # the masks change the result
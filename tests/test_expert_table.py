@@ -0,0 +1,88 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Compiled cache and checks of the expert table
+##########################################################
+
+# import libraries
+import os, shutil, sys
+
+import numpy
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+
+from lulcdown.engine import downscale
+from lulcdown.expert_table import CODE_COL, FIRST_ROW, HEADER_ROW, LABEL_COL, ExpertTable, cache_path, load
+from lulcdown.stats import RunStats
+
+EXPERT_TABLE = os.path.join(HERE, '..', 'expert_table_72cat_v4.xls')
+
+
+class Sheet(object):
+    """Cells of an expert table, read as xlrd does."""
+
+    def __init__(self, codes, columns):
+        self.cells = {}
+        for j, code in enumerate(codes):
+            self.cells[FIRST_ROW + j, CODE_COL] = float(code)
+            self.cells[FIRST_ROW + j, LABEL_COL] = 'code %d' % code
+        for i, (value, weights) in enumerate(columns):
+            self.cells[HEADER_ROW, LABEL_COL + 1 + i] = float(value)
+            for j, weight in enumerate(weights):
+                self.cells[FIRST_ROW + j, LABEL_COL + 1 + i] = float(weight) if weight else ''
+        self.nrows, self.ncols = FIRST_ROW + len(codes), LABEL_COL + 1 + len(columns)
+
+    def cell_value(self, row, col):
+        return self.cells.get((row, col), '')
+
+
+def test_missing_weights_leave_the_pixels_unassigned():
+    sheet = Sheet([10, 20, 30], [(1, [2, 0, 0]), (2, [1, 0, 3]), (3, [1, 1, 0])])  # value 3 has no default (3)
+    with pytest.warns(UserWarning, match='BaseMap25 values 3'):
+        table = ExpertTable.from_sheet(sheet)
+    assert table.unassigned().tolist() == [3]
+    data = numpy.array([[1, 2, 3, 0], [3, 255, 1, 2]], dtype=numpy.uint8)
+    data2 = numpy.full((2, 4), 20, dtype=numpy.uint8)
+    stats = RunStats()
+    out = downscale(data, data2, table, stats=stats)
+    assert (out[data == 3] == 0).all()
+    assert (out[data == 1] == 10).all()
+    assert stats.counts['unassigned'] == 2
+
+
+def test_invalid_weights_are_errors():
+    with pytest.raises(ValueError, match='invalid weight'):
+        ExpertTable.from_sheet(Sheet([10, 20], [(1, [2, 5])]))
+
+
+def test_edited_table_is_compiled_again(tmp_path, monkeypatch):
+    pytest.importorskip('xlrd')
+    path = str(tmp_path / 'expert_table.xls')
+    shutil.copy(EXPERT_TABLE, path)
+    from_xls = ExpertTable.from_xls
+    compiled = []
+
+    def counting(cls, xls):
+        compiled.append(xls)
+        return from_xls(xls)
+
+    monkeypatch.setattr(ExpertTable, 'from_xls', classmethod(counting))
+    first = load(path)
+    assert len(compiled) == 1 and os.path.exists(cache_path(path))
+    cached = load(path)
+    assert len(compiled) == 1  # read from the .npz
+    assert (cached.weights == first.weights).all() and cached.xls_hash == first.xls_hash
+
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 512)  # the spreadsheet saved again: another content, the same cells
+    edited = load(path)
+    assert len(compiled) == 2
+    assert edited.xls_hash != first.xls_hash
+    assert ExpertTable.from_npz(cache_path(path)).xls_hash == edited.xls_hash
+    load(path)
+    assert len(compiled) == 2
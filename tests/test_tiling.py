@@ -0,0 +1,57 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Load-balanced tiles against the regular grid
+##########################################################
+
+# import libraries
+import os, sys
+
+import numpy
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+
+gdal = pytest.importorskip('osgeo.gdal')
+
+from lulcdown.tiling import count_valid, imbalance, plan, regular
+
+####################################################################################
+# The valid pixels are packed in one corner, as Switzerland in its bounding box with
+# the lakes and the neighbouring countries around it, so most tiles of a regular grid
+# are empty while a few hold all the work.
+####################################################################################
+
+
+def _basemap(path, rows=700, cols=900):
+    rs = numpy.random.RandomState(7)
+    y, x = numpy.mgrid[:rows, :cols]
+    data = rs.randint(1, 255, size=(rows, cols)).astype(numpy.uint8)
+    data[(y - 150) ** 2 + (x - 200) ** 2 > 180 ** 2] = 0  # outside the country
+    data[rs.rand(rows, cols) < 0.05] = 255  # no data
+    ds = gdal.GetDriverByName('GTiff').Create(path, cols, rows, 1, gdal.GDT_Byte)
+    ds.GetRasterBand(1).WriteArray(data)
+    ds.FlushCache()
+    ds = None
+    return data
+
+
+def test_balanced_tiles_cover_the_grid_once(tmp_path):
+    path = str(tmp_path / 'basemap.tif')
+    data = _basemap(path)
+    rows, cols = data.shape
+    counts = count_valid(gdal.Open(path).GetRasterBand(1), 32)
+    assert counts.sum() == ((data > 0) & (data < 255)).sum()
+
+    manifest = plan(counts, 36, rows, cols, 32)
+    cover = numpy.zeros((rows, cols), dtype=int)
+    for tile in manifest['tiles']:
+        cover[tile['row0']:tile['row1'], tile['col0']:tile['col1']] += 1
+    assert (cover == 1).all()  # disjoint tiles covering every row and column
+    assert sum(tile['valid'] for tile in manifest['tiles']) == counts.sum()
+    assert len(manifest['tiles']) <= 36
+    assert imbalance(manifest) < imbalance(regular(counts, 6, 6, rows, cols, 32))
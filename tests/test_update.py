@@ -0,0 +1,110 @@
+# coding=utf-8
+##########################################################
+# Authors: Gregory Giuliani, Anthony Lehmann, Denisa Rodila
+# Affiliation: University of Geneva
+# Version: 1.5.0
+# Date: 18.10.2026
+# Incremental update against a full run on the new inputs
+##########################################################
+
+# import libraries
+import os, shutil, sys
+
+import numpy
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))  # make the lulcdown package importable
+
+pytest.importorskip('xlrd')
+
+from lulcdown.engine import downscale
+from lulcdown.expert_table import ExpertTable
+from lulcdown.update import reached
+
+EXPERT_TABLE = os.path.join(HERE, '..', 'expert_table_72cat_v4.xls')
+ROWS, COLS, BLOCK_ROWS = 96, 104, 13  # the groups of rows start and end at every position of the period of 8 rows
+
+####################################################################################
+# Only the Landuse100 pixels at rows 3 mod 4 and columns 2 mod 4 are ever read as
+# neighbours. The changes sit on such pixels and on whole Landuse100 cells (hectares)
+# around the first and last rows of the groups of rows of the update and on the edges
+# of the raster, with no data among the new values, where a dilation of the changes
+# too small by one row or missing the period of round() would leave pixels unpatched;
+# pixels that are never read must not affect anything.
+####################################################################################
+
+READ = [(11, 38), (15, 42), (27, 2), (23, 6), (51, 98), (39, 50), (55, 66), (67, 10), (79, 30), (91, 46), (3, 2),
+        (ROWS - 1, COLS - 2)]
+UNREAD = [(13, 40), (0, 0), (52, 63)]
+BASEMAP = [(12, 37), (13, 37), (0, 0), (ROWS - 1, COLS - 1), (38, 3), (39, 4), (90, 60), (91, 61)]
+
+
+def _reached(changed2):
+    """Pixels reading a changed Landuse100 pixel among their neighbours, as in the per-pixel algorithm of 1.4.5:
+    the 6x6 neighbours of pixel (y, x) are at rows round(y/4)*4-9 and columns round(x/4)*4-10, every 4 pixels."""
+    ys = numpy.array([[round(y / 4) * 4 - 9 + 4 * a for a in range(6)] for y in range(ROWS)])
+    xs = numpy.array([[round(x / 4) * 4 - 10 + 4 * b for b in range(6)] for x in range(COLS)])
+    result = numpy.zeros((ROWS, COLS), dtype=bool)
+    for a in range(6):
+        for b in range(6):
+            y, x = ys[:, a], xs[:, b]
+            inside = ((y >= 0) & (y < ROWS))[:, None] & ((x >= 0) & (x < COLS))[None, :]
+            result |= changed2[numpy.clip(y, 0, ROWS - 1)][:, numpy.clip(x, 0, COLS - 1)] & inside
+    return result
+
+
+def _inputs():
+    rs = numpy.random.RandomState(11)
+    data = rs.choice(numpy.r_[0, 255, numpy.arange(1, 30)], size=(ROWS, COLS)).astype(numpy.uint8)
+    codes = numpy.r_[255, 42, 50, 14, 64, 56, 28, 23, 27, 29, 12, 32, 51]
+    data2 = numpy.kron(rs.choice(codes, size=(ROWS // 4, COLS // 4)), numpy.ones((4, 4))).astype(numpy.uint8)
+    new, new2 = data.copy(), data2.copy()
+    for i, (y, x) in enumerate(READ):
+        cell = new2[y // 4 * 4:y // 4 * 4 + 4, x // 4 * 4:x // 4 * 4 + 4]
+        if i % 2:
+            cell[...] = 255 if i % 4 == 1 else (42 if cell[0, 0] != 42 else 50)  # the hectare is corrected
+        else:
+            new2[y, x] = 255 if i % 4 == 0 else (42 if new2[y, x] != 42 else 50)  # a single read pixel
+    for y, x in UNREAD:
+        new2[y, x] = 28 if new2[y, x] != 28 else 29
+    for i, (y, x) in enumerate(BASEMAP):  # masked, no data, or a value again
+        new[y, x] = (0, 255, 7)[i % 3] if data[y, x] not in (0, 255) else 12
+    return data, data2, new, new2
+
+
+def test_reached_is_the_reverse_of_the_neighbours():
+    for cy, cx in READ + UNREAD:
+        changed = numpy.zeros((ROWS, COLS), dtype=bool)
+        changed[cy, cx] = True
+        expected = _reached(changed)
+        for row0 in range(0, ROWS, BLOCK_ROWS):  # the groups of rows of the update, with their Landuse100 window
+            h = min(BLOCK_ROWS, ROWS - row0)
+            lu_row0, lu_row1 = max(0, row0 - 11), min(ROWS, row0 + h + 13)
+            result = reached(changed[lu_row0:lu_row1], row0, 0, h, COLS, ROWS, COLS, lu_row0, 0)
+            numpy.testing.assert_array_equal(result, expected[row0:row0 + h])
+        assert expected.any() == ((cy, cx) in READ)
+
+
+def test_update_matches_a_full_run(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    from lulcdown.update import update
+    table = ExpertTable.from_xls(EXPERT_TABLE)
+    data, data2, new, new2 = _inputs()
+    paths = {}
+    for name, array in (('old_basemap', data), ('new_basemap', new), ('old_landuse', data2), ('new_landuse', new2),
+                        ('output', downscale(data, data2, table))):
+        paths[name] = str(tmp_path / (name + '.tif'))
+        ds = gdal.GetDriverByName('GTiff').Create(paths[name], COLS, ROWS, 1, gdal.GDT_Byte)
+        ds.SetGeoTransform((2485000.0, 25.0, 0, 1296000.0, 0, -25.0))
+        ds.GetRasterBand(1).WriteArray(array)
+        ds = None
+    paths['expert_table'] = str(tmp_path / 'expert_table.xls')
+    shutil.copy(EXPERT_TABLE, paths['expert_table'])
+
+    report = update(paths['old_basemap'], paths['new_basemap'], paths['old_landuse'], paths['new_landuse'],
+                    paths['expert_table'], paths['output'], block_rows=BLOCK_ROWS)
+    expected = downscale(new, new2, table)
+    numpy.testing.assert_array_equal(gdal.Open(paths['output']).GetRasterBand(1).ReadAsArray(), expected)
+    assert report['update']['output_changed'] == (expected != downscale(data, data2, table)).sum() > 0
+    assert report['update']['affected'] == ((new != data) | _reached(new2 != data2)).sum() < ROWS * COLS